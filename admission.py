@@ -0,0 +1,229 @@
+"""Admission control for classroom-wide bursts.
+
+Two layers protect the score and sync endpoints:
+
+* A per-student token bucket for each route group. Double-clicks and
+  reload storms from one student drain that student's bucket and get a fast
+  ``429`` with ``Retry-After`` instead of reaching the handler. A first page
+  load has no identity yet. A whole classroom can share one NAT address, so
+  such loads skip the bucket and only pass the global gate. At most
+  MAX_TRACKED_BUCKETS buckets are kept; the least recently used is evicted.
+* A global concurrency limit with a short, bounded wait queue. When every
+  slot is busy a request may wait briefly for one to free up; if the queue is
+  full or the wait runs out it is rejected with ``429`` too.
+
+Overloaded requests fail in microseconds, so p99 latency for admitted
+requests stays bounded during a "start now" burst.
+
+Environment variables: ADMISSION_ENABLED (default on),
+ADMISSION_MAX_CONCURRENT (default 16), ADMISSION_QUEUE_DEPTH (default 32),
+ADMISSION_QUEUE_TIMEOUT (seconds, default 0.25).
+"""
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import jsonify, make_response, request
+
+# --- ROUTE GROUP LIMITS: (bucket capacity, tokens refilled per second) ---
+RATE_LIMITS = {
+    "page": (10, 2.0),    # GET / reloads
+    "score": (1, 1.0),    # POST /api/updatescore (one answer at a time)
+    "advance": (2, 0.5),  # POST /api/advancescenario
+    "sync": (5, 2.0),     # POST /api/session/* heartbeats and joins
+}
+MAX_TRACKED_BUCKETS = 10000  # Least recently used buckets are evicted past this size
+STUDENT_COOKIE = "cyber_student"  # Per-browser id set by the index page
+# Groups serving browser navigations: anonymous callers skip the bucket and 429s are self-retrying HTML
+PAGE_GROUPS = {"page"}
+# Student numbers (STU_001) or the server-issued cookie id; anything else is ignored
+_STUDENT_KEY = re.compile(r"[A-Z0-9_-]{1,40}")
+
+RETRY_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta http-equiv="refresh" content="{seconds}">
+    <title>Busy</title>
+</head>
+<body style="font-family: sans-serif; text-align: center; padding-top: 4rem;">
+    <p>{message}</p>
+    <p>This page will reload by itself in {seconds} s.</p>
+</body>
+</html>
+"""
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _normalized(value):
+    if not isinstance(value, str):
+        return None
+    value = value.strip().upper()
+    return value if _STUDENT_KEY.fullmatch(value) else None
+
+
+def student_identity():
+    """Returns the caller's student number or browser id, or None for a first visit."""
+    student = request.headers.get("X-Student-Number") or request.args.get("studentNumber")
+    if not student and request.is_json:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            student = body.get("studentNumber")
+    return _normalized(student) or _normalized(request.cookies.get(STUDENT_COOKIE))
+
+
+def student_key():
+    """Identifies the caller for rate limiting, using the client address as a last resort.
+
+    Students behind one classroom NAT share an address, so the address is a
+    fallback only.
+    """
+    return student_identity() or request.remote_addr or "anonymous"
+
+
+class TokenBucket:
+    """Classic token bucket; callers must hold the controller lock."""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity, rate, now):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = float(capacity)
+        self.updated = now
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now):
+        """Consumes one token. Returns 0 on success, else seconds until one is available."""
+        self._refill(now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Per-student token buckets plus a global concurrency gate with a short queue."""
+
+    def __init__(self, rate_limits=None, max_concurrent=16, queue_depth=32,
+                 queue_timeout=0.25, enabled=True, clock=time.monotonic):
+        self.rate_limits = dict(rate_limits or RATE_LIMITS)
+        self.max_concurrent = max_concurrent
+        self.queue_depth = queue_depth
+        self.queue_timeout = queue_timeout
+        self.enabled = enabled
+        self.clock = clock
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._buckets = OrderedDict()  # Least recently used first
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+
+    # --- PER-STUDENT RATE LIMITING ---
+    def check_rate(self, group, key):
+        """Returns 0 if the request may proceed, else the Retry-After delay in seconds."""
+        capacity, rate = self.rate_limits[group]
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get((group, key))
+            if bucket is None:
+                if len(self._buckets) >= MAX_TRACKED_BUCKETS:
+                    self._buckets.popitem(last=False)
+                bucket = self._buckets[(group, key)] = TokenBucket(capacity, rate, now)
+            else:
+                self._buckets.move_to_end((group, key))
+            return bucket.take(now)
+
+    # --- GLOBAL CONCURRENCY LIMIT ---
+    def acquire_slot(self):
+        """Takes a concurrency slot, waiting briefly in a bounded queue. Returns False on overload."""
+        with self._lock:
+            if self.active < self.max_concurrent and self.waiting == 0:
+                self.active += 1
+                return True
+            if self.waiting >= self.queue_depth:
+                return False
+            self.waiting += 1
+            deadline = self.clock() + self.queue_timeout
+            try:
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - self.clock()
+                    if remaining <= 0 or not self._slot_freed.wait(remaining):
+                        if self.active >= self.max_concurrent:
+                            return False
+                self.active += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release_slot(self):
+        with self._lock:
+            self.active -= 1
+            self._slot_freed.notify()
+
+    # --- FLASK INTEGRATION ---
+    def _reject(self, retry_after, message, page=False):
+        with self._lock:
+            self.rejected += 1
+        seconds = max(1, math.ceil(retry_after))
+        if page:
+            # A browser navigation cannot read Retry-After, so the page reloads itself
+            response = make_response(RETRY_PAGE.format(seconds=seconds, message=message))
+        else:
+            response = jsonify({"success": False, "message": message})
+        response.status_code = 429
+        response.headers["Retry-After"] = str(seconds)
+        return response
+
+    def limit(self, group):
+        """Route decorator applying the group's per-student bucket and the global slot limit."""
+        if group not in self.rate_limits:
+            raise ValueError(f"Unknown admission group: {group}")
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return view(*args, **kwargs)
+                page = group in PAGE_GROUPS
+                key = student_identity() if page else student_key()
+                retry_after = self.check_rate(group, key) if key else 0
+                if retry_after:
+                    return self._reject(retry_after, "Too many requests, please slow down.", page)
+                if not self.acquire_slot():
+                    return self._reject(1, "Server is busy, please retry shortly.", page)
+                try:
+                    return view(*args, **kwargs)
+                finally:
+                    self.release_slot()
+            return wrapper
+        return decorator
+
+
+admission = AdmissionController(
+    max_concurrent=_env_int("ADMISSION_MAX_CONCURRENT", 16),
+    queue_depth=_env_int("ADMISSION_QUEUE_DEPTH", 32),
+    queue_timeout=_env_float("ADMISSION_QUEUE_TIMEOUT", 0.25),
+    enabled=os.environ.get("ADMISSION_ENABLED", "1").lower() not in ("0", "false", "no"),
+)
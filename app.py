@@ -1,14 +1,44 @@
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, abort, request, jsonify, make_response, render_template_string, send_from_directory
 from flask_cors import CORS
 import json
+import os
 import random 
+import re
+import uuid
+
+from admission import STUDENT_COOKIE, admission, student_identity
+from event_log import annotate, init_event_log, log_event
+from profiling import init_profiling
+from score_crdt import REPLICATION_TOKEN_HEADER, ScoreLedger, replication_token_matches, validate_snapshot
+from roster import DEFAULT_DB_PATH, RosterError, assigned_room_code, detect_format, import_roster, wrap_binary_stream
+from session_expiry import SessionTracker
+from teacher_feed import ProgressFeed
 
 app = Flask(__name__)
 CORS(app) 
+init_profiling(app) # No-op unless PROFILING_ENABLED is set
+init_event_log(app) # Queues one JSON access record per request
 
 # --- GLOBAL CONSTANTS FOR FLOW CONTROL ---
 FINAL_SCORE_INDEX = 999
 
+# --- PRECOMPILED STYLESHEET (generated by build_css.py) ---
+STYLESHEET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'css')
+STYLESHEET_MAX_AGE = 31536000 # One year; the file name changes whenever its content does
+HASHED_STYLESHEET = re.compile(r'app\.[0-9a-f]{12}\.css') # Names written by build_css.py
+
+def load_stylesheet_tag():
+    """Links the content-hashed stylesheet, falling back to the Tailwind CDN if it was never built."""
+    try:
+        with open(os.path.join(STYLESHEET_DIR, 'manifest.json'), encoding='utf-8') as f:
+            file_name = json.load(f)['app.css']
+    except (OSError, ValueError, KeyError):
+        app.logger.warning("static/css/manifest.json missing; run build_css.py. Using the Tailwind CDN instead.")
+        return '<script src="https://cdn.tailwindcss.com"></script>'
+    return f'<link rel="stylesheet" href="/assets/css/{file_name}">'
+
+STYLESHEET_TAG = load_stylesheet_tag()
+
 # --- SCENARIO DATA DEFINITIONS ---
 
 # 1. Phishing Email Scenario (ID 101)
@@ -59,10 +89,13 @@ ALL_SCENARIOS = [
     SCENARIO_MFA       # Index 2 (NEW FINAL SCENARIO)
 ]
 TOTAL_SCENARIOS = len(ALL_SCENARIOS)
+SCENARIOS_BY_ID = {scenario['id']: scenario for scenario in ALL_SCENARIOS}
 
 # --- SIMULATED DATABASE/SCORE STORAGE ---
+# Keyed by student number or browser id; callers that send neither share the demo user
+DEMO_USER_ID = "teacher_user_id_1"
 user_data = {
-    "teacher_user_id_1": {
+    DEMO_USER_ID: {
         "score": 0,
         "current_scenario_index": -1 # -1 means Module/Start Page
     }
@@ -70,25 +103,85 @@ user_data = {
 # ----------------------------------------
 
 
+def current_user_id():
+    """Identifies the student behind a request (X-Student-Number, studentNumber or the browser cookie)."""
+    return student_identity() or DEMO_USER_ID
+
+def user_record(user_id):
+    """Returns the student's progress record, starting them on the module page if new."""
+    return user_data.setdefault(user_id, {"score": 0, "current_scenario_index": -1})
+
+
+def snapshot_class_progress():
+    """Copies the fields the teacher dashboard needs for every student in one pass."""
+    return {
+        user_id: {
+            "score": record['score'],
+            "current_scenario_index": record['current_scenario_index'],
+            "completed": record['current_scenario_index'] == FINAL_SCORE_INDEX,
+        }
+        for user_id, record in list(user_data.items())
+        if user_id != DEMO_USER_ID
+    }
+
+teacher_feed = ProgressFeed(snapshot_class_progress)
+
+
+def drop_student_state(student_id):
+    """Expiry callback: forgets the assessment state of a session dropped after 45 s of silence."""
+    user_data.pop(student_id, None)
+    log_event("session_dropped", user=student_id)
+
+sessions = SessionTracker(on_drop=drop_student_state)
+
+# Replicated per-student, per-module score counters shared with other classroom nodes,
+# kept in cybergame.db so a restart loses neither the points nor the node id
+score_ledger = ScoreLedger(db_path=DEFAULT_DB_PATH)
+
+
+def session_student_id():
+    """Reads and normalizes studentNumber from the JSON body, like localserver.js."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    student_number = data.get('studentNumber')
+    if not isinstance(student_number, str) or not student_number.strip():
+        return None, data
+    return student_number.strip().upper(), data
+
+
 # 1. API route to update score
 @app.route('/api/updatescore', methods=['POST'])
+@admission.limit("score")
 def update_score():
     """Receives points data from the frontend and updates the user's score, advancing the scenario index."""
     try:
+        user_id = current_user_id()
         data = request.get_json()
-        user_id = "teacher_user_id_1" # Hardcoded user for this single-user demo
         points = data.get('points')
         
+        annotate(user=user_id, scenario=data.get('scenario'), points=points)
+        
         if not isinstance(points, int):
             return jsonify({"success": False, "message": "Invalid points value"}), 400
 
+        record = user_record(user_id)
+
+        # Reject repeats (double-clicks, retried posts) for a scenario that was already scored
+        current_index = record['current_scenario_index']
+        scenario_id = data.get('scenario')
+        if scenario_id is not None and not (
+            0 <= current_index < TOTAL_SCENARIOS and ALL_SCENARIOS[current_index]['id'] == scenario_id
+        ):
+            return jsonify({"success": False, "message": "Scenario already scored", "current_index": current_index}), 409
+
         # Update the score
-        user_data[user_id]['score'] += points
-        new_score = user_data[user_id]['score']
+        record['score'] += points
+        new_score = record['score']
+        scenario = SCENARIOS_BY_ID.get(data.get('scenario'))
+        score_ledger.add(user_id, scenario['type'] if scenario else "assessment", points)
         
         # Update the scenario index for the next step
-        current_index = user_data[user_id]['current_scenario_index']
-        
         if current_index == (TOTAL_SCENARIOS - 1):
             # This was the last assessment scenario. Set to final score state.
             new_index = FINAL_SCORE_INDEX
@@ -96,7 +189,7 @@ def update_score():
             # Move to the next scenario
             new_index = current_index + 1
             
-        user_data[user_id]['current_scenario_index'] = new_index
+        record['current_scenario_index'] = new_index
 
         return jsonify({
             "success": True, 
@@ -104,22 +197,129 @@ def update_score():
             "new_index": new_index
         })
     except Exception as e:
-        print(f"Error updating score: {e}")
+        log_event("score_update_error", level="error", user=user_id, error=str(e))
         return jsonify({"success": False, "message": str(e)}), 500
 
 # 2. API route to advance from Module to first assessment
 @app.route('/api/advancescenario', methods=['POST'])
+@admission.limit("advance")
 def advance_scenario():
     """Advances the scenario index, typically from Module (-1) to first scenario (0)."""
-    user_id = "teacher_user_id_1"
+    user_id = current_user_id()
+    annotate(user=user_id)
+    record = user_record(user_id)
     
-    if user_data[user_id]['current_scenario_index'] == -1:
-        user_data[user_id]['current_scenario_index'] = 0
+    if record['current_scenario_index'] == -1:
+        record['current_scenario_index'] = 0
         return jsonify({"success": True, "new_index": 0})
     
     return jsonify({"success": False, "message": "Not in a state to advance"}), 400
 
 
+# 3. Live class progress feed for teacher dashboards (Server-Sent Events)
+@app.route('/api/teacher/stream', methods=['GET'])
+def teacher_stream():
+    """Streams a progress snapshot followed by coalesced per-student deltas."""
+    return teacher_feed.response()
+
+
+# 4. Bulk roster import (CSV or NDJSON streamed in the request body)
+@app.route('/api/teacher/roster', methods=['POST'])
+def import_roster_upload():
+    """Streams an uploaded roster into the student database in batched transactions."""
+    fmt = request.args.get('format') or detect_format(content_type=request.content_type or "")
+    try:
+        report = import_roster(wrap_binary_stream(request.stream), fmt=fmt)
+    except RosterError as e:
+        partial = e.report or {}
+        return jsonify({"success": False, "message": str(e), "line": e.line, **partial}), 400
+    log_event("roster_import", rows=report['rows'], inserted=report['inserted'],
+              rejected=report['rejected'], seconds=report['seconds'])
+    return jsonify({"success": True, **report})
+
+
+# 5. Session presence: join, heartbeat and leave (expired by the timing wheel)
+@app.route('/api/session/join', methods=['POST'])
+@admission.limit("sync")
+def session_join():
+    """Starts a student session, taking over a ghost session older than 15 s."""
+    student_id, data = session_student_id()
+    if student_id is None:
+        return jsonify({"success": False, "message": "Missing studentNumber"}), 400
+    room_code = assigned_room_code(student_id)
+    if not room_code:
+        return jsonify({"success": False, "message": f"Access Denied: Student number {student_id} is out of bounds."}), 403
+    annotate(user=student_id)
+
+    if sessions.join(student_id, room_code=room_code, inactive=bool(data.get('isInactive'))) is None:
+        return jsonify({"success": False, "message": f"Access Denied: Student number {student_id} is already active in a running session."}), 409
+    user_data.setdefault(student_id, {"score": 0, "current_scenario_index": -1})
+    return jsonify({"success": True, "roomCode": room_code})
+
+@app.route('/api/session/heartbeat', methods=['POST'])
+@admission.limit("sync")
+def session_heartbeat():
+    """Keeps a session alive; O(1) reschedule of its ghost and drop timers."""
+    student_id, data = session_student_id()
+    if student_id is None or not assigned_room_code(student_id):
+        return jsonify({"success": False, "message": "Invalid identity range for synchronization."}), 403
+    sessions.heartbeat(student_id, inactive=bool(data.get('isInactive')))
+    user_data.setdefault(student_id, {"score": 0, "current_scenario_index": -1})
+    return jsonify({"success": True})
+
+@app.route('/api/session/leave', methods=['POST'])
+def session_leave():
+    """Ends presence immediately (sent via navigator.sendBeacon on page unload); scores are kept."""
+    data = request.get_json(silent=True, force=True)
+    student_number = data.get('studentNumber') if isinstance(data, dict) else None
+    if not isinstance(student_number, str) or not student_number.strip():
+        return jsonify({"success": False, "message": "Missing studentNumber"}), 400
+    sessions.leave(student_number.strip().upper())
+    return jsonify({"success": True})
+
+
+# 6. Multi-node score replication (PN-counter export/merge between classroom servers)
+@app.route('/api/scores', methods=['GET'])
+def replicated_scores():
+    """Returns converged per-student, per-module totals."""
+    return jsonify({"success": True, "node": score_ledger.node_id, "scores": score_ledger.totals()})
+
+@app.route('/api/scores/export', methods=['GET'])
+def export_scores():
+    """Exports counter state changed after ?since=<seq> (0 for a full snapshot)."""
+    if not replication_token_matches(request.headers.get(REPLICATION_TOKEN_HEADER)):
+        return jsonify({"success": False, "message": "Replication token required"}), 403
+    since = request.args.get('since', default=0, type=int)
+    return jsonify({"success": True, **score_ledger.export(since=since)})
+
+@app.route('/api/scores/merge', methods=['POST'])
+def merge_scores():
+    """Merges a peer's export; safe to repeat or apply out of order."""
+    # A merged count can never be taken back, so only trusted peers may merge
+    if not replication_token_matches(request.headers.get(REPLICATION_TOKEN_HEADER)):
+        return jsonify({"success": False, "message": "Replication token required"}), 403
+    snapshot = request.get_json(silent=True)
+    error = validate_snapshot(snapshot)
+    if error:
+        return jsonify({"success": False, "message": error}), 400
+    merged = score_ledger.merge(snapshot)
+    log_event("scores_merged", peer=snapshot.get('node'), entries=len(snapshot['entries']), changed=merged)
+    return jsonify({"success": True, "changed": merged, "node": score_ledger.node_id, "seq": score_ledger.seq})
+
+
+# 7. Precompiled stylesheet with long-lived caching
+@app.route('/assets/css/<file_name>')
+def stylesheet(file_name):
+    """Serves the content-hashed stylesheet; safe to cache forever."""
+    # Only hashed builds are immutable; manifest.json and other files are not served here
+    if not HASHED_STYLESHEET.fullmatch(file_name):
+        abort(404)
+    response = send_from_directory(STYLESHEET_DIR, file_name, max_age=STYLESHEET_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
 # --- TEMPLATE DEFINITIONS ---
 
 # FIXED: Escaped curly braces in CSS (lines 191, 192)
@@ -130,7 +330,7 @@ MODULE_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Cyber Module</title>
-    <script src="https://cdn.tailwindcss.com"></script>
+    {stylesheet_tag}
     <style>
         @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
         body {{ font-family: 'Inter', sans-serif; background-color: #f7f7f7; }}
@@ -175,6 +375,8 @@ MFA is critically important because standard single-factor authentication method
     </div>
 
     <script>
+        const STUDENT_ID = document.querySelector('meta[name="student-id"]').content;
+
         document.getElementById('start-assessment-btn').addEventListener('click', function() {{
             const button = this;
             button.disabled = true;
@@ -183,11 +385,20 @@ MFA is critically important because standard single-factor authentication method
             // API Call to advance index from -1 (Module) to 0 (First Scenario)
             fetch('/api/advancescenario', {{
                 method: 'POST',
-                headers: {{ 'Content-Type': 'application/json' }},
+                headers: {{ 'Content-Type': 'application/json', 'X-Student-Number': STUDENT_ID }},
                 body: JSON.stringify({{}}) // Empty body is fine
             }})
-            .then(response => response.json())
+            .then(response => {{
+                if (response.status === 429) {{
+                    // Server busy: nothing was recorded, so try again after the advised delay
+                    const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 1;
+                    setTimeout(() => {{ button.disabled = false; button.click(); }}, retryAfter * 1000);
+                    return null;
+                }}
+                return response.json();
+            }})
             .then(data => {{
+                if (!data) return;
                 if (data.success) {{
                     // Reload the page, which will now load the first scenario (index 0)
                     window.location.reload();
@@ -215,7 +426,7 @@ SCORE_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Final Score</title>
-    <script src="https://cdn.tailwindcss.com"></script>
+    {stylesheet_tag}
     <style>
         @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
         body {{ font-family: 'Inter', sans-serif; background-color: #f0f4f8; }}
@@ -270,7 +481,7 @@ def get_phishing_template(scenarioData):
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Phishing Scenario</title>
-    <script src="https://cdn.tailwindcss.com"></script>
+    {STYLESHEET_TAG}
     <style>
         @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
         body {{ font-family: 'Inter', sans-serif; background-color: #e2e8f0; }}
@@ -332,6 +543,7 @@ def get_phishing_template(scenarioData):
 
     <script>
         // --- Common JavaScript Code ---
+        const STUDENT_ID = document.querySelector('meta[name="student-id"]').content;
         let currentScore = parseInt(document.getElementById('score-display').textContent) || 0;
         const scoreDisplay = document.getElementById('score-display');
         const resultMessage = document.getElementById('result-message');
@@ -352,14 +564,28 @@ def get_phishing_template(scenarioData):
             // API CALL TO PYTHON BACKEND to persist the score and advance the index
             fetch('/api/updatescore', {{
                 method: 'POST',
-                headers: {{ 'Content-Type': 'application/json' }},
+                headers: {{ 'Content-Type': 'application/json', 'X-Student-Number': STUDENT_ID }},
                 body: JSON.stringify({{
                     scenario: phishingScenarioID,
                     points: points
                 }})
             }})
-            .then(response => response.json())
+            .then(response => {{
+                if (response.status === 429) {{
+                    // Server busy: the score was not recorded, so retry after the advised delay
+                    const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 1;
+                    setTimeout(() => updateScore(points), retryAfter * 1000);
+                    return null;
+                }}
+                if (response.status === 409) {{
+                    // This scenario was already scored (e.g. a double-click); show the current step
+                    window.location.reload();
+                    return null;
+                }}
+                return response.json();
+            }})
             .then(data => {{
+                if (!data) return;
                 if (data.success) {{
                     currentScore = data.new_score;
                     scoreDisplay.textContent = currentScore;
@@ -438,7 +664,7 @@ def get_password_template(scenarioData):
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Password Scenario</title>
-    <script src="https://cdn.tailwindcss.com"></script>
+    {STYLESHEET_TAG}
     <style>
         @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
         body {{ font-family: 'Inter', sans-serif; background-color: #f0f4f8; }}
@@ -501,6 +727,7 @@ def get_password_template(scenarioData):
 
     <script>
         // --- Common JavaScript Code ---
+        const STUDENT_ID = document.querySelector('meta[name="student-id"]').content;
         let currentScore = parseInt(document.getElementById('score-display').textContent) || 0;
         const scoreDisplay = document.getElementById('score-display');
         const passwordInput = document.getElementById('password-input');
@@ -524,14 +751,28 @@ def get_password_template(scenarioData):
             // API CALL TO PYTHON BACKEND to persist the score and advance the index
             fetch('/api/updatescore', {{
                 method: 'POST',
-                headers: {{ 'Content-Type': 'application/json' }},
+                headers: {{ 'Content-Type': 'application/json', 'X-Student-Number': STUDENT_ID }},
                 body: JSON.stringify({{
                     scenario: scenarioData.id,
                     points: points
                 }})
             }})
-            .then(response => response.json())
+            .then(response => {{
+                if (response.status === 429) {{
+                    // Server busy: the score was not recorded, so retry after the advised delay
+                    const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 1;
+                    setTimeout(() => updateScore(points), retryAfter * 1000);
+                    return null;
+                }}
+                if (response.status === 409) {{
+                    // This scenario was already scored (e.g. a double-click); show the current step
+                    window.location.reload();
+                    return null;
+                }}
+                return response.json();
+            }})
             .then(data => {{
+                if (!data) return;
                 if (data.success) {{
                     currentScore = data.new_score;
                     scoreDisplay.textContent = currentScore;
@@ -674,7 +915,7 @@ def get_mfa_template(scenarioData):
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>MFA Scenario</title>
-    <script src="https://cdn.tailwindcss.com"></script>
+    {STYLESHEET_TAG}
     <style>
         @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
         body {{ font-family: 'Inter', sans-serif; background-color: #e5e7eb; }}
@@ -707,6 +948,7 @@ def get_mfa_template(scenarioData):
 
     <script>
         // --- Common JavaScript Code ---
+        const STUDENT_ID = document.querySelector('meta[name="student-id"]').content;
         let currentScore = parseInt(document.getElementById('score-display').textContent) || 0;
         const scoreDisplay = document.getElementById('score-display');
         const resultMessage = document.getElementById('result-message');
@@ -727,14 +969,28 @@ def get_mfa_template(scenarioData):
             // API CALL TO PYTHON BACKEND to persist the score and advance the index
             fetch('/api/updatescore', {{
                 method: 'POST',
-                headers: {{ 'Content-Type': 'application/json' }},
+                headers: {{ 'Content-Type': 'application/json', 'X-Student-Number': STUDENT_ID }},
                 body: JSON.stringify({{
                     scenario: scenarioData.id,
                     points: points
                 }})
             }})
-            .then(response => response.json())
+            .then(response => {{
+                if (response.status === 429) {{
+                    // Server busy: the score was not recorded, so retry after the advised delay
+                    const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 1;
+                    setTimeout(() => updateScore(points), retryAfter * 1000);
+                    return null;
+                }}
+                if (response.status === 409) {{
+                    // This scenario was already scored (e.g. a double-click); show the current step
+                    window.location.reload();
+                    return null;
+                }}
+                return response.json();
+            }})
             .then(data => {{
+                if (!data) return;
                 if (data.success) {{
                     currentScore = data.new_score;
                     scoreDisplay.textContent = currentScore;
@@ -798,30 +1054,46 @@ def get_mfa_template(scenarioData):
     """
 # --- 3. MAIN ROUTE LOGIC ---
 
+STUDENT_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+def student_page(html, user_id, browser_id):
+    """Adds the student's identity to a rendered page so its API calls carry it, and sets the browser cookie if new."""
+    html = html.replace('</head>', f'    <meta name="student-id" content="{user_id}">\n</head>', 1)
+    response = make_response(html)
+    if request.cookies.get(STUDENT_COOKIE) == browser_id:
+        return response  # Already stored; the year-long cookie needs no refresh on every page
+    response.set_cookie(STUDENT_COOKIE, browser_id, max_age=365 * 24 * 3600, httponly=True, samesite='Lax')
+    return response
+
 @app.route('/')
+@admission.limit("page")
 def index():
-    user_id = "teacher_user_id_1" # Hardcoded user for this single-user demo
+    # Per-browser identity so each student has their own progress and admission buckets
+    browser_id = request.cookies.get(STUDENT_COOKIE, '')
+    if not STUDENT_ID_PATTERN.fullmatch(browser_id):
+        browser_id = uuid.uuid4().hex
+    user_id = student_identity() or browser_id.upper()
     
-    # Check if user data exists, initialize if not (for robustness)
-    if user_id not in user_data:
-        user_data[user_id] = {"score": 0, "current_scenario_index": -1}
+    # New visitors see the module page; their record is only stored once they start (advance_scenario)
+    record = user_data.get(user_id) or {"score": 0, "current_scenario_index": -1}
         
-    current_index = user_data[user_id]['current_scenario_index']
-    current_score = user_data[user_id]['score']
+    current_index = record['current_scenario_index']
+    current_score = record['score']
+    annotate(user=user_id, scenario_index=current_index)
     
     if current_index == -1:
         # Render Module Page
-        return render_template_string(MODULE_TEMPLATE.format(current_score=current_score, TOTAL_SCENARIOS=TOTAL_SCENARIOS))
+        return student_page(render_template_string(MODULE_TEMPLATE.format(current_score=current_score, TOTAL_SCENARIOS=TOTAL_SCENARIOS, stylesheet_tag=STYLESHEET_TAG)), user_id, browser_id)
         
     elif current_index == FINAL_SCORE_INDEX:
         # Render Final Score Page
         final_score_value = current_score
         
         # Reset user data for next playthrough
-        user_data[user_id]['score'] = 0
-        user_data[user_id]['current_scenario_index'] = -1
+        record['score'] = 0
+        record['current_scenario_index'] = -1
         
-        return render_template_string(SCORE_TEMPLATE.format(final_score=final_score_value, total_scenarios=TOTAL_SCENARIOS))
+        return student_page(render_template_string(SCORE_TEMPLATE.format(final_score=final_score_value, total_scenarios=TOTAL_SCENARIOS, stylesheet_tag=STYLESHEET_TAG)), user_id, browser_id)
         
     elif 0 <= current_index < TOTAL_SCENARIOS:
         # Render a specific Assessment Scenario
@@ -840,12 +1112,12 @@ def index():
         template = template.replace(
             '<!-- CURRENT_SCORE_PLACEHOLDER -->', str(current_score)
         )
-        return render_template_string(template)
+        return student_page(render_template_string(template), user_id, browser_id)
         
     else:
         # Fallback to the start
-        user_data[user_id]['current_scenario_index'] = -1
-        return render_template_string(MODULE_TEMPLATE.format(current_score=current_score, TOTAL_SCENARIOS=TOTAL_SCENARIOS))
+        record['current_scenario_index'] = -1
+        return student_page(render_template_string(MODULE_TEMPLATE.format(current_score=current_score, TOTAL_SCENARIOS=TOTAL_SCENARIOS, stylesheet_tag=STYLESHEET_TAG)), user_id, browser_id)
 
 # --- 4. RUN THE APPLICATION ---
 if __name__ == '__main__':
@@ -0,0 +1,290 @@
+"""Microbenchmarks for the render and scoring hot paths in app.py.
+
+Run from the repository root:
+
+    python benchmarks/bench_hotpaths.py                    # compare against baseline
+    python benchmarks/bench_hotpaths.py --update-baseline  # record a new baseline
+
+Each hot path is timed in isolation (direct function calls) and end-to-end
+through the Flask test client. Rounds run round-robin over every benchmark,
+each round keeps its fastest run, and a result is the median over rounds, so
+one noisy stretch cannot move a single benchmark. A fixed calibration
+workload runs in every round. Results are scaled by how fast it ran compared
+with the baseline machine, which cancels whole-machine speed drift instead
+of absorbing it with wider limits. Results are compared with
+benchmarks/baseline.json and the script exits non-zero when any benchmark is
+slower than its baseline by more than its threshold (25% unless the
+baseline records another value).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import timeit
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+# Scores are persisted; keep benchmark points out of the real cybergame.db
+os.environ["CYBERGAME_DB"] = os.path.join(tempfile.mkdtemp(prefix="bench-"), "cybergame.db")
+
+import app as cyber_app  # noqa: E402
+from flask import render_template_string  # noqa: E402
+
+# --- BENCHMARK CONFIGURATION ---
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+BASELINE_VERSION = 3
+DEFAULT_THRESHOLD = 0.25  # Fail when a benchmark is more than 25% slower than baseline
+ROUNDS = 7                # Median of this many rounds per benchmark
+REPEAT = 3                # Best-of-N timing runs inside one round
+TARGET_RUN_SECONDS = 0.1  # Each timing run is scaled to roughly this long
+
+USER_ID = "STU_001"
+# What a returning student's browser sends: the rendered pages' header and the per-browser cookie
+HEADERS = {"X-Student-Number": USER_ID, "Cookie": "cyber_student=" + "0" * 32}
+
+# The per-student token buckets would turn tight benchmark loops into 429s
+cyber_app.admission.enabled = False
+
+
+def _reset_user(index=-1, score=0):
+    """Puts the demo user back into a known state between iterations."""
+    cyber_app.user_data[USER_ID] = {"score": score, "current_scenario_index": index}
+
+
+# --- ISOLATED BENCHMARKS ---
+def bench_get_phishing_template():
+    cyber_app.get_phishing_template(cyber_app.SCENARIO_PHISHING)
+
+
+def bench_get_password_template():
+    cyber_app.get_password_template(cyber_app.SCENARIO_PASSWORD)
+
+
+def bench_get_mfa_template():
+    cyber_app.get_mfa_template(cyber_app.SCENARIO_MFA)
+
+
+def bench_module_template_format():
+    cyber_app.MODULE_TEMPLATE.format(
+        current_score=0, TOTAL_SCENARIOS=cyber_app.TOTAL_SCENARIOS, stylesheet_tag=cyber_app.STYLESHEET_TAG
+    )
+
+
+def bench_score_template_format():
+    cyber_app.SCORE_TEMPLATE.format(
+        final_score=25, total_scenarios=cyber_app.TOTAL_SCENARIOS, stylesheet_tag=cyber_app.STYLESHEET_TAG
+    )
+
+
+_RENDERED_MFA = cyber_app.get_mfa_template(cyber_app.SCENARIO_MFA)
+
+
+def bench_render_template_string():
+    with cyber_app.app.app_context():
+        render_template_string(_RENDERED_MFA)
+
+
+def bench_update_score_handler():
+    _reset_user(index=0)
+    with cyber_app.app.test_request_context(
+        "/api/updatescore", method="POST", json={"scenario": 101, "points": 10}, headers=HEADERS
+    ):
+        cyber_app.update_score()
+
+
+# --- END-TO-END BENCHMARKS (FLASK TEST CLIENT) ---
+# Cookie-jar bookkeeping is test-client overhead, not server work, so keep it out of the timings
+_client = cyber_app.app.test_client(use_cookies=False)
+
+
+def bench_client_index_module():
+    _reset_user(index=-1)
+    _client.get("/", headers=HEADERS)
+
+
+def bench_client_index_phishing():
+    _reset_user(index=0)
+    _client.get("/", headers=HEADERS)
+
+
+def bench_client_index_password():
+    _reset_user(index=1)
+    _client.get("/", headers=HEADERS)
+
+
+def bench_client_index_mfa():
+    _reset_user(index=2)
+    _client.get("/", headers=HEADERS)
+
+
+def bench_client_index_final_score():
+    _reset_user(index=cyber_app.FINAL_SCORE_INDEX, score=25)
+    _client.get("/", headers=HEADERS)
+
+
+def bench_client_update_score():
+    _reset_user(index=0)
+    _client.post("/api/updatescore", json={"scenario": 101, "points": 10}, headers=HEADERS)
+
+
+BENCHMARKS = {
+    "get_phishing_template": bench_get_phishing_template,
+    "get_password_template": bench_get_password_template,
+    "get_mfa_template": bench_get_mfa_template,
+    "module_template_format": bench_module_template_format,
+    "score_template_format": bench_score_template_format,
+    "render_template_string": bench_render_template_string,
+    "update_score_handler": bench_update_score_handler,
+    "client_index_module": bench_client_index_module,
+    "client_index_phishing": bench_client_index_phishing,
+    "client_index_password": bench_client_index_password,
+    "client_index_mfa": bench_client_index_mfa,
+    "client_index_final_score": bench_client_index_final_score,
+    "client_update_score": bench_client_update_score,
+}
+
+
+# --- CALIBRATION ---
+CALIBRATION = "calibration"
+_CALIBRATION_DATA = {f"key{i}": list(range(i % 7)) for i in range(200)}
+
+
+def calibration_workload():
+    """Fixed interpreter and C-extension work that never changes with app.py."""
+    json.dumps(_CALIBRATION_DATA)
+    "".join(f"{key}={value!r};" for key, value in _CALIBRATION_DATA.items())
+
+
+def _timer(func):
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    # Scale the loop count so every timing run lasts about TARGET_RUN_SECONDS
+    return timer, max(1, int(number * TARGET_RUN_SECONDS / max(elapsed, 1e-9)))
+
+
+def time_benchmarks(funcs):
+    """Returns {name: median per-round cost of one call, in microseconds}, timing rounds round-robin."""
+    timers = {name: _timer(func) for name, func in funcs.items()}
+    rounds = {name: [] for name in funcs}
+    for _ in range(ROUNDS):
+        for name, (timer, number) in timers.items():
+            rounds[name].append(min(timer.repeat(repeat=REPEAT, number=number)) / number * 1e6)
+    return {name: statistics.median(values) for name, values in rounds.items()}
+
+
+def run_benchmarks(selected):
+    """Times the selected benchmarks plus the calibration workload."""
+    saved_user = cyber_app.user_data.get(USER_ID)
+    try:
+        # Warm up caches (Jinja template cache, werkzeug routing) before timing anything
+        for name in selected:
+            BENCHMARKS[name]()
+        funcs = {name: BENCHMARKS[name] for name in selected}
+        funcs[CALIBRATION] = calibration_workload
+        results = time_benchmarks(funcs)
+        for name, value in results.items():
+            print(f"{name:<28} {value:>10.2f} us/op")
+    finally:
+        if saved_user is None:
+            cyber_app.user_data.pop(USER_ID, None)
+        else:
+            cyber_app.user_data[USER_ID] = saved_user
+    return results
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("version") != BASELINE_VERSION:
+        print(f"Ignoring baseline {path}: version {baseline.get('version')} != {BASELINE_VERSION}")
+        return None
+    return baseline
+
+
+def write_baseline(path, results, thresholds):
+    results = dict(results)
+    baseline = {
+        "version": BASELINE_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "calibration_us": round(results.pop(CALIBRATION), 3),
+        "thresholds": {name: thresholds.get(name, DEFAULT_THRESHOLD) for name in sorted(results)},
+        "results_us": {name: round(value, 3) for name, value in sorted(results.items())},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+    print(f"Baseline written to {path}")
+
+
+def compare(results, baseline, thresholds):
+    """Prints a comparison table and returns the names of benchmarks over their threshold."""
+    regressions = []
+    recorded = baseline["results_us"]
+    results = dict(results)
+    # >1 when this machine (or this moment) is slower than when the baseline was recorded
+    speed = results.pop(CALIBRATION) / baseline["calibration_us"]
+    print(f"\nCalibration: {speed:.2f}x the baseline machine's time; current results are divided by it.")
+    print(f"{'benchmark':<28} {'baseline':>10} {'current':>10} {'change':>8} {'limit':>7}")
+    for name, raw in results.items():
+        current = raw / speed
+        if name not in recorded:
+            print(f"{name:<28} {'-':>10} {current:>10.2f} {'new':>8}")
+            continue
+        change = (current - recorded[name]) / recorded[name]
+        flag = ""
+        if change > thresholds[name]:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<28} {recorded[name]:>10.2f} {current:>10.2f} {change:>+7.1%} {thresholds[name]:>+6.0%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Path to the baseline JSON file.")
+    parser.add_argument("--update-baseline", action="store_true", help="Record the current results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help=f"Allowed slowdown as a fraction for every benchmark (default: baseline values, else {DEFAULT_THRESHOLD}).")
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="Run only the named benchmarks.")
+    args = parser.parse_args(argv)
+
+    selected = args.only or list(BENCHMARKS)
+    results = run_benchmarks(selected)
+
+    baseline = load_baseline(args.baseline)
+    thresholds = {name: DEFAULT_THRESHOLD for name in BENCHMARKS}
+    if baseline:
+        thresholds.update(baseline.get("thresholds", {}))
+    if args.threshold is not None:
+        thresholds = {name: args.threshold for name in thresholds}
+
+    if args.update_baseline:
+        if baseline and args.only:
+            # Keep entries for benchmarks that were not re-run, rescaled to this run's calibration
+            speed = results[CALIBRATION] / baseline["calibration_us"]
+            merged = {name: value * speed for name, value in baseline["results_us"].items()}
+            merged.update(results)
+            results = merged
+        write_baseline(args.baseline, results, thresholds)
+        return 0
+
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+
+    regressions = compare(results, baseline, thresholds)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed past their threshold: {', '.join(regressions)}")
+        return 1
+    print("\nAll benchmarks within their thresholds of baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
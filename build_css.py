@@ -0,0 +1,348 @@
+"""Build step for the self-hosted stylesheet that replaces the Tailwind CDN script.
+
+Scans app.py for the utility classes its templates use (``class="..."``
+attributes and ``classList.add/remove(...)`` calls in the inline scripts),
+generates the matching Tailwind v3 rules plus a compact preflight reset, and
+writes one minified, content-hashed file:
+
+    static/css/app.<hash>.css
+    static/css/manifest.json   {"app.css": "app.<hash>.css"}
+
+app.py reads the manifest at startup and links the hashed file, which is
+served with a one-year immutable Cache-Control header. Rerun this script
+whenever template classes change:
+
+    python build_css.py
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOURCES = [os.path.join(ROOT_DIR, "app.py")]
+OUTPUT_DIR = os.path.join(ROOT_DIR, "static", "css")
+MANIFEST_NAME = "manifest.json"
+BUNDLE_NAME = "app.css"
+
+CLASS_ATTR = re.compile(r"""class=["']([^"'{}]*)["']""")
+CLASS_LIST_CALL = re.compile(r"classList\.(?:add|remove|toggle)\(([^)]*)\)")
+QUOTED = re.compile(r"""['"]([^'"]+)['"]""")
+
+# --- DESIGN TOKENS (Tailwind v3 defaults) ---
+PALETTE = {
+    "gray": ["#f9fafb", "#f3f4f6", "#e5e7eb", "#d1d5db", "#9ca3af", "#6b7280", "#4b5563", "#374151", "#1f2937", "#111827"],
+    "red": ["#fef2f2", "#fee2e2", "#fecaca", "#fca5a5", "#f87171", "#ef4444", "#dc2626", "#b91c1c", "#991b1b", "#7f1d1d"],
+    "yellow": ["#fefce8", "#fef9c3", "#fef08a", "#fde047", "#facc15", "#eab308", "#ca8a04", "#a16207", "#854d0e", "#713f12"],
+    "green": ["#f0fdf4", "#dcfce7", "#bbf7d0", "#86efac", "#4ade80", "#22c55e", "#16a34a", "#15803d", "#166534", "#14532d"],
+    "blue": ["#eff6ff", "#dbeafe", "#bfdbfe", "#93c5fd", "#60a5fa", "#3b82f6", "#2563eb", "#1d4ed8", "#1e40af", "#1e3a8a"],
+    "indigo": ["#eef2ff", "#e0e7ff", "#c7d2fe", "#a5b4fc", "#818cf8", "#6366f1", "#4f46e5", "#4338ca", "#3730a3", "#312e81"],
+    "purple": ["#faf5ff", "#f3e8ff", "#e9d5ff", "#d8b4fe", "#c084fc", "#a855f7", "#9333ea", "#7e22ce", "#6b21a8", "#581c87"],
+}
+SHADES = ["50", "100", "200", "300", "400", "500", "600", "700", "800", "900"]
+COLORS = {"white": "#ffffff", "black": "#000000"}
+for _name, _values in PALETTE.items():
+    COLORS.update({f"{_name}-{shade}": value for shade, value in zip(SHADES, _values)})
+
+FONT_SIZES = {
+    "xs": ("0.75rem", "1rem"), "sm": ("0.875rem", "1.25rem"), "base": ("1rem", "1.5rem"),
+    "lg": ("1.125rem", "1.75rem"), "xl": ("1.25rem", "1.75rem"), "2xl": ("1.5rem", "2rem"),
+    "3xl": ("1.875rem", "2.25rem"), "4xl": ("2.25rem", "2.5rem"), "5xl": ("3rem", "1"),
+    "6xl": ("3.75rem", "1"),
+}
+FONT_WEIGHTS = {"normal": 400, "medium": 500, "semibold": 600, "bold": 700, "extrabold": 800, "black": 900}
+RADII = {"": "0.25rem", "md": "0.375rem", "lg": "0.5rem", "xl": "0.75rem", "2xl": "1rem", "full": "9999px"}
+SHADOWS = {
+    "": "0 1px 3px 0 rgb(0 0 0/.1),0 1px 2px -1px rgb(0 0 0/.1)",
+    "md": "0 4px 6px -1px rgb(0 0 0/.1),0 2px 4px -2px rgb(0 0 0/.1)",
+    "lg": "0 10px 15px -3px rgb(0 0 0/.1),0 4px 6px -4px rgb(0 0 0/.1)",
+    "xl": "0 20px 25px -5px rgb(0 0 0/.1),0 8px 10px -6px rgb(0 0 0/.1)",
+    "2xl": "0 25px 50px -12px rgb(0 0 0/.25)",
+    "inner": "inset 0 2px 4px 0 rgb(0 0 0/.05)",
+}
+BREAKPOINTS = {"sm": "640px", "md": "768px", "lg": "1024px", "xl": "1280px"}
+PSEUDO_VARIANTS = {"hover": ":hover", "focus": ":focus", "disabled": ":disabled"}
+VARIANT_ORDER = ["hover", "focus", "disabled"] + list(BREAKPOINTS)
+
+TRANSFORM = ("transform:translate(var(--tw-translate-x),var(--tw-translate-y)) rotate(var(--tw-rotate)) "
+             "scaleX(var(--tw-scale-x)) scaleY(var(--tw-scale-y))")
+TRANSITION_TIMING = "transition-timing-function:cubic-bezier(.4,0,.2,1);transition-duration:150ms"
+TRANSITION_COLORS = ("color,background-color,border-color,text-decoration-color,fill,stroke,opacity,"
+                     "box-shadow,transform,filter,backdrop-filter")
+
+PREFLIGHT = (
+    "*,::before,::after{box-sizing:border-box;border-width:0;border-style:solid;border-color:#e5e7eb;"
+    "--tw-translate-x:0;--tw-translate-y:0;--tw-rotate:0;--tw-scale-x:1;--tw-scale-y:1;"
+    "--tw-ring-offset-width:0px;--tw-ring-offset-color:#fff;--tw-ring-color:rgb(59 130 246/.5);"
+    "--tw-ring-offset-shadow:0 0 #0000;--tw-ring-shadow:0 0 #0000;--tw-shadow:0 0 #0000}"
+    "html{line-height:1.5;-webkit-text-size-adjust:100%;tab-size:4;font-family:ui-sans-serif,system-ui,"
+    "-apple-system,'Segoe UI',Roboto,'Helvetica Neue',Arial,sans-serif}"
+    "body{margin:0;line-height:inherit}"
+    "hr{height:0;color:inherit;border-top-width:1px}"
+    "h1,h2,h3,h4,h5,h6{font-size:inherit;font-weight:inherit}"
+    "a{color:inherit;text-decoration:inherit}"
+    "b,strong{font-weight:bolder}"
+    "button,input,optgroup,select,textarea{font-family:inherit;font-size:100%;font-weight:inherit;"
+    "line-height:inherit;color:inherit;margin:0;padding:0}"
+    "button,select{text-transform:none}"
+    "button,[type=button],[type=reset],[type=submit]{-webkit-appearance:button;background-color:transparent;"
+    "background-image:none}"
+    ":-moz-focusring{outline:auto}"
+    "blockquote,dl,dd,h1,h2,h3,h4,h5,h6,hr,figure,p,pre{margin:0}"
+    "ol,ul,menu{list-style:none;margin:0;padding:0}"
+    "input::placeholder,textarea::placeholder{opacity:1;color:#9ca3af}"
+    "button,[role=button]{cursor:pointer}"
+    ":disabled{cursor:default}"
+    "img,svg,video,canvas,audio,iframe,embed,object{display:block;vertical-align:middle}"
+    "img,video{max-width:100%;height:auto}"
+    "[hidden]{display:none}"
+)
+
+
+def _spacing(value):
+    if value == "0":
+        return "0px"
+    if value == "px":
+        return "1px"
+    if re.fullmatch(r"\d+(\.5)?", value):
+        return f"{float(value) / 4:g}rem"
+    return None
+
+
+def _color(value):
+    """Resolves 'indigo-600' or 'white/20' to a CSS color."""
+    name, _, alpha = value.partition("/")
+    hex_value = COLORS.get(name)
+    if hex_value is None or (alpha and not alpha.isdigit()):
+        return None
+    if not alpha:
+        return hex_value
+    r, g, b = (int(hex_value[i:i + 2], 16) for i in (1, 3, 5))
+    return f"rgb({r} {g} {b}/{int(alpha) / 100:g})"
+
+
+# --- UTILITY RULES ---
+# Each rule is (pattern, handler). The handler gets the regex match and returns
+# either a declaration string or a (selector_suffix, declarations) pair.
+# List order is emission order, mirroring Tailwind's utility ordering.
+def _static(declarations):
+    return lambda m: declarations
+
+
+def _box(prop_sides):
+    def handler(m):
+        size = _spacing(m.group(2))
+        if size is None:
+            return None
+        return ";".join(f"{prop}:{size}" for prop in prop_sides[m.group(1)])
+    # Shorthands sort before axes and single sides so 'p-4 pt-2' behaves as in Tailwind
+    handler.order = {prefix: i for i, prefix in enumerate(prop_sides)}
+    return handler
+
+
+PADDING = {"p": ["padding"], "px": ["padding-left", "padding-right"], "py": ["padding-top", "padding-bottom"],
+           "pt": ["padding-top"], "pr": ["padding-right"], "pb": ["padding-bottom"], "pl": ["padding-left"]}
+MARGIN = {"m": ["margin"], "mx": ["margin-left", "margin-right"], "my": ["margin-top", "margin-bottom"],
+          "mt": ["margin-top"], "mr": ["margin-right"], "mb": ["margin-bottom"], "ml": ["margin-left"]}
+
+
+def _space(m):
+    size = _spacing(m.group(2))
+    if size is None:
+        return None
+    side = "left" if m.group(1) == "x" else "top"
+    opposite = "right" if m.group(1) == "x" else "bottom"
+    return ">:not([hidden])~:not([hidden])", f"margin-{side}:{size};margin-{opposite}:0"
+
+
+def _sized(prop):
+    keywords = {"full": "100%", "screen": "100vh", "auto": "auto"}
+
+    def handler(m):
+        value = keywords.get(m.group(1)) or _spacing(m.group(1))
+        return f"{prop}:{value}" if value else None
+    return handler
+
+
+def _color_rule(prop):
+    def handler(m):
+        value = _color(m.group(1))
+        return f"{prop}:{value}" if value else None
+    return handler
+
+
+def _font_size(m):
+    size = FONT_SIZES.get(m.group(1))
+    return f"font-size:{size[0]};line-height:{size[1]}" if size else None
+
+
+def _font_weight(m):
+    weight = FONT_WEIGHTS.get(m.group(1))
+    return f"font-weight:{weight}" if weight else None
+
+
+def _radius(m):
+    radius = RADII.get(m.group(1) or "")
+    return f"border-radius:{radius}" if radius else None
+
+
+def _border_width(m):
+    sides = {None: "border-width", "t": "border-top-width", "r": "border-right-width",
+             "b": "border-bottom-width", "l": "border-left-width"}
+    return f"{sides[m.group(1)]}:{m.group(2) or 1}px"
+
+
+def _shadow(m):
+    shadow = SHADOWS.get(m.group(1) or "")
+    if shadow is None:
+        return None
+    return (f"--tw-shadow:{shadow};box-shadow:var(--tw-ring-offset-shadow,0 0 #0000),"
+            f"var(--tw-ring-shadow,0 0 #0000),var(--tw-shadow)")
+
+
+def _ring_width(m):
+    width = m.group(1) or "3"
+    return ("--tw-ring-offset-shadow:0 0 0 var(--tw-ring-offset-width) var(--tw-ring-offset-color);"
+            f"--tw-ring-shadow:0 0 0 calc({width}px + var(--tw-ring-offset-width)) var(--tw-ring-color);"
+            "box-shadow:var(--tw-ring-offset-shadow),var(--tw-ring-shadow),var(--tw-shadow,0 0 #0000)")
+
+
+def _scale(m):
+    value = int(m.group(1)) / 100
+    return f"--tw-scale-x:{value:g};--tw-scale-y:{value:g};{TRANSFORM}"
+
+
+RULES = [
+    (r"(m|mx|my|mt|mr|mb|ml)-(\S+)", _box(MARGIN)),
+    (r"flex", _static("display:flex")),
+    (r"hidden", _static("display:none")),
+    (r"block", _static("display:block")),
+    (r"h-(\S+)", _sized("height")),
+    (r"min-h-(screen|full)", _sized("min-height")),
+    (r"w-(\S+)", _sized("width")),
+    (r"transform", _static(TRANSFORM)),
+    (r"scale-(\d+)", _scale),
+    (r"cursor-not-allowed", _static("cursor:not-allowed")),
+    (r"cursor-pointer", _static("cursor:pointer")),
+    (r"flex-col", _static("flex-direction:column")),
+    (r"items-center", _static("align-items:center")),
+    (r"justify-(start|end|center|between)", lambda m: "justify-content:" + {
+        "start": "flex-start", "end": "flex-end", "center": "center", "between": "space-between"}[m.group(1)]),
+    (r"space-(x|y)-(\S+)", _space),
+    (r"rounded(?:-(\S+))?", _radius),
+    (r"border(?:-([trbl]))?(?:-(\d+))?", _border_width),
+    (r"border-(\S+)", _color_rule("border-color")),
+    (r"bg-(\S+)", _color_rule("background-color")),
+    (r"(p|px|py|pt|pr|pb|pl)-(\S+)", _box(PADDING)),
+    (r"text-(left|center|right|justify)", lambda m: f"text-align:{m.group(1)}"),
+    (r"text-(xs|sm|base|lg|\d?xl)", _font_size),
+    (r"font-(\S+)", _font_weight),
+    (r"italic", _static("font-style:italic")),
+    (r"text-(\S+)", _color_rule("color")),
+    (r"underline", _static("text-decoration-line:underline")),
+    (r"opacity-(\d+)", lambda m: f"opacity:{int(m.group(1)) / 100:g}"),
+    (r"shadow(?:-(\S+))?", _shadow),
+    (r"outline-none", _static("outline:2px solid transparent;outline-offset:2px")),
+    (r"ring(?:-(\d+))?", _ring_width),
+    (r"ring-(\S+)", lambda m: f"--tw-ring-color:{_color(m.group(1))}" if _color(m.group(1)) else None),
+    (r"backdrop-blur-sm", _static("-webkit-backdrop-filter:blur(4px);backdrop-filter:blur(4px)")),
+    (r"transition", _static(f"transition-property:{TRANSITION_COLORS};{TRANSITION_TIMING}")),
+    (r"transition-all", _static(f"transition-property:all;{TRANSITION_TIMING}")),
+    (r"duration-(\d+)", lambda m: f"transition-duration:{m.group(1)}ms"),
+]
+COMPILED_RULES = [(re.compile(pattern), handler) for pattern, handler in RULES]
+
+
+# --- SCANNING ---
+def scan_classes(paths):
+    """Collects every class name used in the given source files."""
+    classes = set()
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        for attr in CLASS_ATTR.findall(source):
+            classes.update(attr.split())
+        for call in CLASS_LIST_CALL.findall(source):
+            classes.update(QUOTED.findall(call))
+    return classes
+
+
+# --- GENERATION ---
+def _escape(class_name):
+    return re.sub(r"([:/.\[\]])", r"\\\1", class_name)
+
+
+def compile_class(class_name):
+    """Returns (sort_key, css_rule) for a utility class, or None if it is not a known utility."""
+    *variants, utility = class_name.split(":")
+    if any(v not in PSEUDO_VARIANTS and v not in BREAKPOINTS for v in variants):
+        return None
+    for index, (pattern, handler) in enumerate(COMPILED_RULES):
+        match = pattern.fullmatch(utility)
+        if not match:
+            continue
+        result = handler(match)
+        if result is None:
+            continue
+        suffix, declarations = result if isinstance(result, tuple) else ("", result)
+        pseudo = "".join(PSEUDO_VARIANTS[v] for v in variants if v in PSEUDO_VARIANTS)
+        rule = f".{_escape(class_name)}{pseudo}{suffix}{{{declarations}}}"
+        breakpoint = next((v for v in variants if v in BREAKPOINTS), None)
+        if breakpoint:
+            rule = f"@media (min-width:{BREAKPOINTS[breakpoint]}){{{rule}}}"
+        variant_rank = max((VARIANT_ORDER.index(v) + 1 for v in variants), default=0)
+        sub_order = getattr(handler, "order", {}).get(match.group(1) if match.groups() else None, 0)
+        return (variant_rank, index, sub_order, class_name), rule
+    return None
+
+
+def build_stylesheet(classes):
+    """Returns (css, unknown_classes) for the given set of class names."""
+    compiled, unknown = [], []
+    for class_name in classes:
+        result = compile_class(class_name)
+        if result is None:
+            unknown.append(class_name)
+        else:
+            compiled.append(result)
+    compiled.sort()
+    return PREFLIGHT + "".join(rule for _, rule in compiled), sorted(unknown)
+
+
+def write_bundle(css, output_dir=OUTPUT_DIR):
+    """Writes the content-hashed stylesheet and manifest; removes stale bundles."""
+    os.makedirs(output_dir, exist_ok=True)
+    digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+    stem, ext = os.path.splitext(BUNDLE_NAME)
+    file_name = f"{stem}.{digest}{ext}"
+    for stale in glob.glob(os.path.join(output_dir, f"{stem}.*{ext}")):
+        if os.path.basename(stale) != file_name:
+            os.remove(stale)
+    with open(os.path.join(output_dir, file_name), "w", encoding="utf-8") as f:
+        f.write(css)
+    with open(os.path.join(output_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump({BUNDLE_NAME: file_name}, f, indent=2)
+        f.write("\n")
+    return file_name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the minified, content-hashed stylesheet for app.py.")
+    parser.add_argument("sources", nargs="*", default=DEFAULT_SOURCES, help="Files to scan (default: app.py).")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Where to write the bundle and manifest.")
+    args = parser.parse_args(argv)
+
+    css, unknown = build_stylesheet(scan_classes(args.sources))
+    file_name = write_bundle(css, args.output_dir)
+    print(f"Wrote {os.path.join(args.output_dir, file_name)} ({len(css)} bytes)")
+    if unknown:
+        # Component classes such as 'email-container' are styled by the templates' own <style> blocks
+        print("Not utilities (left to template styles): " + ", ".join(unknown))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Non-blocking structured access and event logging.
+
+Request handlers never touch stdout or the filesystem. They call
+``log_event`` (or ``annotate`` to enrich the access record of the current
+request), which builds a small dict and puts it on a bounded in-memory queue.
+A single background writer thread wakes every FLUSH_INTERVAL, drains the
+queue in batches, serializes each record as one JSON line and appends the
+batch to a size-rotated file. It does not wake per record, so a burst of
+requests costs one file append rather than one per request.
+
+If the queue is full the record is dropped and counted instead of blocking
+the request thread. Level and sampling checks run before any record is
+built, so filtered-out events cost one comparison.
+
+Environment variables:
+
+* EVENT_LOG_ENABLED            - set to 0 to turn logging off (default on)
+* EVENT_LOG_DIR                - output directory (default ``logs``)
+* EVENT_LOG_LEVEL              - debug | info | warning | error (default info)
+* EVENT_LOG_ACCESS_SAMPLE_RATE - fraction of access records kept (default 1.0)
+* EVENT_LOG_MAX_BYTES          - rotate after this many bytes (default 10 MB)
+* EVENT_LOG_BACKUPS            - rotated files to keep (default 5)
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+
+from flask import g, request
+
+# --- LOGGING CONFIGURATION ---
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+QUEUE_SIZE = 10000     # Records buffered before new ones are dropped
+BATCH_SIZE = 500       # Records written per file append
+FLUSH_INTERVAL = 0.5   # Seconds the writer sleeps between partial batches
+LOG_FILE_NAME = "events.jsonl"
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class EventLogger:
+    """Queue-backed JSON-lines logger with a single background writer thread."""
+
+    def __init__(self, log_dir, level="info", access_sample_rate=1.0,
+                 max_bytes=10 * 1024 * 1024, backups=5, enabled=True):
+        self.log_dir = log_dir
+        self.level = LEVELS.get(level, LEVELS["info"])
+        self.access_sample_rate = access_sample_rate
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.enabled = enabled
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._writer = None
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    # --- PRODUCER SIDE (REQUEST THREADS) ---
+    def is_enabled_for(self, level):
+        return self.enabled and LEVELS.get(level, 0) >= self.level
+
+    def log(self, event, level="info", sample_rate=1.0, **fields):
+        """Queues one structured record. Never blocks and never raises."""
+        if not self.is_enabled_for(level):
+            return
+        if sample_rate < 1.0 and random.random() >= sample_rate:
+            return
+        record = {"ts": time.time(), "level": level, "event": event}
+        record.update(fields)
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    # --- CONSUMER SIDE (WRITER THREAD) ---
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._start_lock:
+            if self._writer is not None:
+                return
+            os.makedirs(self.log_dir, exist_ok=True)
+            # RotatingFileHandler handles size-based rotation; each batch is
+            # emitted as a single record so rotation never splits a batch.
+            handler = logging.handlers.RotatingFileHandler(
+                os.path.join(self.log_dir, LOG_FILE_NAME),
+                maxBytes=self.max_bytes, backupCount=self.backups, encoding="utf-8",
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._handler = handler
+            self._writer = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
+    def _drain_batch(self):
+        batch = []
+        try:
+            while len(batch) < BATCH_SIZE:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write_batch(self, batch):
+        lines = "\n".join(json.dumps(record, default=str, ensure_ascii=False) for record in batch)
+        self._handler.emit(logging.LogRecord("event_log", logging.INFO, "", 0, lines, None, None))
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._drain_batch()
+            if len(batch) < BATCH_SIZE:
+                # Caught up: sleep instead of waking for every record (close() cuts this short)
+                self._stopping.wait(FLUSH_INTERVAL)
+            if not batch:
+                continue
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                batch.append({"ts": time.time(), "level": "warning", "event": "log_records_dropped", "count": dropped})
+            try:
+                self._write_batch(batch)
+            except Exception:
+                # A broken disk must not take the writer thread down with it
+                self.dropped += len(batch)
+
+    def close(self, timeout=2.0):
+        """Flushes queued records and stops the writer thread."""
+        if self._writer is None:
+            return
+        self._stopping.set()
+        self._writer.join(timeout)
+        self._handler.close()
+
+
+event_logger = EventLogger(
+    log_dir=os.environ.get("EVENT_LOG_DIR", "logs"),
+    level=os.environ.get("EVENT_LOG_LEVEL", "info").lower(),
+    access_sample_rate=_env_float("EVENT_LOG_ACCESS_SAMPLE_RATE", 1.0),
+    max_bytes=_env_int("EVENT_LOG_MAX_BYTES", 10 * 1024 * 1024),
+    backups=_env_int("EVENT_LOG_BACKUPS", 5),
+    enabled=os.environ.get("EVENT_LOG_ENABLED", "1").lower() not in ("0", "false", "no"),
+)
+
+
+def log_event(event, level="info", sample_rate=1.0, **fields):
+    """Module-level shortcut for event_logger.log."""
+    event_logger.log(event, level=level, sample_rate=sample_rate, **fields)
+
+
+def annotate(**fields):
+    """Adds fields (user, scenario id, points, ...) to the current request's access record."""
+    if event_logger.enabled:
+        g.setdefault("_log_fields", {}).update(fields)
+
+
+# --- FLASK INTEGRATION ---
+def init_event_log(app, logger=event_logger):
+    """Registers request hooks that emit one access record per request."""
+    if not logger.enabled:
+        return False
+
+    @app.before_request
+    def _start_access_timer():
+        g._log_started = time.perf_counter()
+
+    @app.after_request
+    def _record_access(response):
+        started = g.get("_log_started")
+        if started is None or not logger.is_enabled_for("info"):
+            return response
+        fields = g.get("_log_fields", {})
+        logger.log(
+            "access",
+            sample_rate=logger.access_sample_rate,
+            method=request.method,
+            route=request.url_rule.rule if request.url_rule else request.path,
+            status=response.status_code,
+            latency_ms=round((time.perf_counter() - started) * 1000, 3),
+            **fields,
+        )
+        return response
+
+    return True
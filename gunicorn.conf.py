@@ -0,0 +1,17 @@
+"""Gunicorn settings for the classroom server.
+
+The teacher dashboard holds a Server-Sent Events stream open for as long as
+the page is visible. A sync worker serves one request at a time, so a single
+open stream would block every student. Threaded workers (gthread) keep each
+stream on its own thread while the other threads keep serving API calls.
+
+Gunicorn loads this file automatically when started from the repository
+root. Tune it with GUNICORN_WORKERS and GUNICORN_THREADS.
+"""
+import os
+
+worker_class = "gthread"
+# State (progress, sessions, score ledger) lives in process memory, so keep one worker by default
+workers = int(os.environ.get("GUNICORN_WORKERS", "1"))
+# Leave room for the admission limit (ADMISSION_MAX_CONCURRENT) plus open dashboard streams
+threads = int(os.environ.get("GUNICORN_THREADS", "32"))
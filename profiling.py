@@ -0,0 +1,206 @@
+"""On-demand profiling hooks for the Flask server.
+
+Profiling is opt-in. Nothing is registered on the app unless the
+PROFILING_ENABLED environment variable is set, so a normal deployment pays
+no per-request cost at all.
+
+When enabled (PROFILING_ENABLED=1, PROFILING_ADMIN_TOKEN=<secret>):
+
+* Single request: send the header ``X-Profile: <token>`` (or the query
+  parameter ``__profile=<token>``) and that one request runs under cProfile.
+  A ``.pstats`` file is written to PROFILING_DIR.
+* Sampling: ``POST /admin/profiling/sample?seconds=30`` starts a background
+  sampler that records the stacks of every request thread for the given
+  window and writes a collapsed-stack ``.folded`` file (flamegraph input).
+  Only threads that are serving a request are sampled, so idle background
+  threads and the accept loop do not show up in the output.
+* ``GET /admin/profiling`` lists the captured files and
+  ``GET /admin/profiling/<name>`` downloads one.
+
+All admin endpoints require the same token via the ``X-Profile-Token``
+header.
+"""
+import cProfile
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import abort, g, jsonify, request, send_from_directory
+
+# --- PROFILING CONFIGURATION ---
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY_PARAM = "__profile"
+ADMIN_TOKEN_HEADER = "X-Profile-Token"
+DEFAULT_PROFILE_DIR = "profiles"
+DEFAULT_SAMPLE_INTERVAL = 0.005  # Seconds between stack samples
+MAX_SAMPLE_SECONDS = 300         # Upper bound for one sampling window
+PROFILE_EXTENSIONS = (".pstats", ".folded")
+
+# Only one cProfile session can be active per process on newer Pythons,
+# so single-request profiles are serialized through this lock.
+_cprofile_lock = threading.Lock()
+_sampler_lock = threading.Lock()
+_sampler_state = {"thread": None, "ends_at": 0.0}
+# Idents of threads currently inside a request, tracked only while sampling
+_request_threads = set()
+
+
+def _is_enabled():
+    return os.environ.get("PROFILING_ENABLED", "").lower() in ("1", "true", "yes")
+
+
+def _token_matches(candidate, token):
+    # compare_digest rejects non-ASCII str, so compare the UTF-8 bytes instead
+    return bool(candidate) and hmac.compare_digest(candidate.encode("utf-8"), token.encode("utf-8"))
+
+
+def _output_path(profile_dir, prefix, extension):
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    name = f"{prefix}-{stamp}-{int(time.time() * 1000) % 1000:03d}{extension}"
+    return os.path.join(profile_dir, name)
+
+
+def _request_label():
+    """Builds a filesystem-safe label such as 'POST_api_updatescore'."""
+    path = request.path.strip("/").replace("/", "_") or "index"
+    return f"{request.method}_{path}"
+
+
+# --- SAMPLING PROFILER ---
+def _collapse_stack(frame):
+    """Turns a frame into 'outer;inner;leaf' collapsed-stack notation."""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+def _run_sampler(profile_dir, seconds, interval):
+    samples = Counter()
+    ends_at = time.monotonic() + seconds
+    while time.monotonic() < ends_at:
+        with _sampler_lock:
+            idents = tuple(_request_threads)
+        if idents:
+            frames = sys._current_frames()
+            for ident in idents:
+                frame = frames.get(ident)
+                if frame is not None:
+                    samples[_collapse_stack(frame)] += 1
+        time.sleep(interval)
+
+    path = _output_path(profile_dir, "sample", ".folded")
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+
+    with _sampler_lock:
+        _sampler_state["thread"] = None
+        _sampler_state["ends_at"] = 0.0
+        _request_threads.clear()
+
+
+def start_sampling(profile_dir, seconds, interval=DEFAULT_SAMPLE_INTERVAL):
+    """Starts a time-boxed sampling session. Returns False if one is already running."""
+    with _sampler_lock:
+        if _sampler_state["thread"] is not None:
+            return False
+        thread = threading.Thread(
+            target=_run_sampler, args=(profile_dir, seconds, interval),
+            name="profiling-sampler", daemon=True,
+        )
+        _sampler_state["thread"] = thread
+        _sampler_state["ends_at"] = time.time() + seconds
+    thread.start()
+    return True
+
+
+# --- FLASK INTEGRATION ---
+def init_profiling(app):
+    """Registers the profiling hooks and admin endpoints when profiling is enabled."""
+    if not _is_enabled():
+        return False
+
+    token = os.environ.get("PROFILING_ADMIN_TOKEN", "")
+    if not token:
+        app.logger.warning("PROFILING_ENABLED is set but PROFILING_ADMIN_TOKEN is empty; profiling stays off.")
+        return False
+
+    profile_dir = os.path.abspath(os.environ.get("PROFILING_DIR", DEFAULT_PROFILE_DIR))
+    os.makedirs(profile_dir, exist_ok=True)
+
+    def require_admin():
+        if not _token_matches(request.headers.get(ADMIN_TOKEN_HEADER, ""), token):
+            abort(403)
+
+    @app.before_request
+    def _start_request_profile():
+        if _sampler_state["thread"] is not None:
+            with _sampler_lock:
+                if _sampler_state["thread"] is not None:
+                    _request_threads.add(threading.get_ident())
+                    g._sampled = True
+        candidate = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_QUERY_PARAM)
+        if not _token_matches(candidate, token):
+            return
+        # Skip rather than block if another request is already being profiled
+        if not _cprofile_lock.acquire(blocking=False):
+            return
+        profiler = cProfile.Profile()
+        g._profiler = profiler
+        profiler.enable()
+
+    @app.teardown_request
+    def _finish_request_profile(exc):
+        if g.pop("_sampled", False):
+            with _sampler_lock:
+                _request_threads.discard(threading.get_ident())
+        profiler = g.pop("_profiler", None)
+        if profiler is None:
+            return
+        try:
+            profiler.disable()
+            profiler.dump_stats(_output_path(profile_dir, _request_label(), ".pstats"))
+        finally:
+            _cprofile_lock.release()
+
+    @app.route('/admin/profiling', methods=['GET'])
+    def list_profiles():
+        """Lists captured profile files, newest first."""
+        require_admin()
+        entries = []
+        for name in os.listdir(profile_dir):
+            if not name.endswith(PROFILE_EXTENSIONS):
+                continue
+            stat = os.stat(os.path.join(profile_dir, name))
+            entries.append({"name": name, "bytes": stat.st_size, "modified": stat.st_mtime})
+        entries.sort(key=lambda entry: entry["modified"], reverse=True)
+        with _sampler_lock:
+            sampling_until = _sampler_state["ends_at"] or None
+        return jsonify({"success": True, "profiles": entries, "sampling_until": sampling_until})
+
+    @app.route('/admin/profiling/<path:name>', methods=['GET'])
+    def download_profile(name):
+        """Downloads a single profile file."""
+        require_admin()
+        if not name.endswith(PROFILE_EXTENSIONS):
+            abort(404)
+        return send_from_directory(profile_dir, name, as_attachment=True)
+
+    @app.route('/admin/profiling/sample', methods=['POST'])
+    def start_sampling_window():
+        """Samples every request thread for a bounded number of seconds."""
+        require_admin()
+        seconds = request.args.get('seconds', default=30, type=int)
+        if seconds is None or not 1 <= seconds <= MAX_SAMPLE_SECONDS:
+            return jsonify({"success": False, "message": f"seconds must be between 1 and {MAX_SAMPLE_SECONDS}"}), 400
+        if not start_sampling(profile_dir, seconds):
+            return jsonify({"success": False, "message": "A sampling session is already running"}), 409
+        return jsonify({"success": True, "seconds": seconds})
+
+    return True
@@ -0,0 +1,226 @@
+"""Bulk roster import into the local student database (cybergame.db).
+
+Rosters are streamed row by row, so memory use stays constant no matter how
+large the file is. Two formats are accepted:
+
+* CSV with a header row containing ``student_number`` (or ``studentNumber``)
+* NDJSON, one ``{"student_number": "STU_001"}`` object (or bare string) per line
+
+Every student number is validated against the same room-assignment rules
+as localserver.js (STU_001-STU_060 -> ROOM1-ROOM6). Valid rows are inserted
+in large batches, one transaction per batch. Students that already exist
+keep their scores untouched.
+
+Command line usage:
+
+    python roster.py roster.csv [--db cybergame.db] [--format csv|ndjson]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+# --- ROSTER CONFIGURATION ---
+DEFAULT_DB_PATH = os.environ.get(
+    "CYBERGAME_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cybergame.db")
+)
+BATCH_SIZE = 5000      # Rows per INSERT transaction
+MAX_REPORTED_ERRORS = 50
+STUDENT_NUMBER_FIELDS = ("student_number", "studentNumber")
+
+# --- ROOM CODE ALLOCATION MAPPING (mirrors getAssignedRoomCode in localserver.js) ---
+STUDENTS_PER_ROOM = 10
+ROOM_COUNT = 6
+
+# Same schema localserver.js creates on startup
+CREATE_STUDENTS_TABLE = """CREATE TABLE IF NOT EXISTS students (
+    student_number TEXT PRIMARY KEY,
+    safe_score INTEGER DEFAULT 0,
+    savvy_score INTEGER DEFAULT 0,
+    social_score INTEGER DEFAULT 0,
+    safe_completed INTEGER DEFAULT 0,
+    savvy_completed INTEGER DEFAULT 0,
+    social_completed INTEGER DEFAULT 0,
+    last_active TEXT
+)"""
+INSERT_STUDENT = "INSERT OR IGNORE INTO students (student_number) VALUES (?)"
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+class RosterError(ValueError):
+    """Raised when a roster cannot be parsed (bad header, unknown format, undecodable bytes).
+
+    ``line`` is the last roster line read before the failure, and ``report``
+    holds the counts so far. Batches counted in ``report["inserted"]`` and
+    ``report["existing"]`` were already committed and stay in the database.
+    """
+
+    def __init__(self, message, line=None, report=None):
+        super().__init__(message)
+        self.line = line
+        self.report = report
+
+
+def assigned_room_code(student_number):
+    """Returns 'ROOM1'..'ROOM6' for an authorized student number, else None."""
+    digits = _NON_DIGITS.sub("", student_number).lstrip("0")
+    # Check the length first: int() refuses strings past ~4300 digits with a ValueError
+    if not digits or len(digits) > len(str(STUDENTS_PER_ROOM * ROOM_COUNT)):
+        return None
+    numeric_id = int(digits)
+    if not 1 <= numeric_id <= STUDENTS_PER_ROOM * ROOM_COUNT:
+        return None
+    return f"ROOM{(numeric_id - 1) // STUDENTS_PER_ROOM + 1}"
+
+
+# --- STREAMING PARSERS ---
+def _field_from(record):
+    for field in STUDENT_NUMBER_FIELDS:
+        if field in record:
+            return record[field]
+    return None
+
+
+def iter_csv(text_stream):
+    """Yields (line_number, raw_student_number) from a CSV roster."""
+    reader = csv.DictReader(text_stream)
+    if not reader.fieldnames or not any(f in reader.fieldnames for f in STUDENT_NUMBER_FIELDS):
+        raise RosterError("CSV roster needs a 'student_number' header column.")
+    for record in reader:
+        yield reader.line_num, _field_from(record)
+
+
+def iter_ndjson(text_stream):
+    """Yields (line_number, raw_student_number) from an NDJSON roster."""
+    for line_number, line in enumerate(text_stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        yield line_number, record if isinstance(record, str) else (
+            _field_from(record) if isinstance(record, dict) else None
+        )
+
+
+PARSERS = {"csv": iter_csv, "ndjson": iter_ndjson}
+
+
+def detect_format(name="", content_type=""):
+    """Guesses the roster format from a file name or Content-Type header."""
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type or "jsonl" in content_type:
+        return "ndjson"
+    return "csv"
+
+
+# --- IMPORT ---
+def _valid_rows(rows, report, position):
+    for line_number, raw in rows:
+        position["line"] = line_number
+        report["rows"] += 1
+        student_number = raw.strip().upper() if isinstance(raw, str) else ""
+        if student_number and assigned_room_code(student_number):
+            yield student_number
+            continue
+        report["rejected"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({
+                "line": line_number,
+                "value": raw,
+                "error": "missing student number" if not student_number
+                else f"{student_number} falls outside the authorized range (STU_001 to STU_060).",
+            })
+
+
+def _batches(values, size):
+    batch = []
+    for value in values:
+        batch.append((value,))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_roster(text_stream, fmt="csv", db_path=DEFAULT_DB_PATH, batch_size=BATCH_SIZE):
+    """Streams a roster into the students table and returns an import report dict."""
+    if fmt not in PARSERS:
+        raise RosterError(f"Unknown roster format: {fmt}")
+    report = {"rows": 0, "inserted": 0, "existing": 0, "rejected": 0, "errors": []}
+    position = {"line": 0}
+    started = time.perf_counter()
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(CREATE_STUDENTS_TABLE)
+        try:
+            for batch in _batches(_valid_rows(PARSERS[fmt](text_stream), report, position), batch_size):
+                conn.execute("BEGIN")
+                try:
+                    before = conn.total_changes
+                    conn.executemany(INSERT_STUDENT, batch)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                inserted = conn.total_changes - before
+                report["inserted"] += inserted
+                report["existing"] += len(batch) - inserted
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Rows parsed since the last commit were never written; earlier batches are kept
+            report["seconds"] = round(time.perf_counter() - started, 3)
+            committed = report["inserted"] + report["existing"]
+            raise RosterError(
+                f"Roster unreadable after line {position['line']} ({e}); {committed} rows were already imported.",
+                line=position["line"], report=report,
+            ) from e
+    finally:
+        conn.close()
+
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def import_roster_file(path, fmt=None, db_path=DEFAULT_DB_PATH):
+    fmt = fmt or detect_format(name=path)
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return import_roster(f, fmt=fmt, db_path=db_path)
+
+
+def wrap_binary_stream(binary_stream):
+    """Decodes a binary upload stream (e.g. request.stream) lazily as UTF-8 text."""
+    return io.TextIOWrapper(binary_stream, encoding="utf-8-sig", newline="")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-import a student roster into cybergame.db.")
+    parser.add_argument("roster", help="Path to a CSV or NDJSON roster file.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite database path (default: cybergame.db).")
+    parser.add_argument("--format", choices=sorted(PARSERS), help="Roster format (default: from file extension).")
+    args = parser.parse_args(argv)
+
+    try:
+        report = import_roster_file(args.roster, fmt=args.format, db_path=args.db)
+    except RosterError as e:
+        print(f"Roster import failed: {e}", file=sys.stderr)
+        if e.report is not None:
+            print(json.dumps(e.report, indent=2))
+        return 2
+    print(json.dumps(report, indent=2))
+    return 0 if report["rejected"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""Conflict-free replicated score counters for multi-classroom deployments.
+
+Each classroom server (node) keeps a ScoreLedger. Every (student, module)
+pair is a PN-counter: one grow-only tally of positive points and one of
+negative points, each split per node. A node only ever increments its own
+component. Merging takes the per-node maximum, so merges are commutative,
+associative and idempotent. Nodes can therefore exchange snapshots in any
+order, any number of times, and still converge to the same totals without
+double counting.
+
+Merges are incremental. Every change to an entry, whether a local increment
+or a value learned in a merge, stamps the entry with the node's next
+sequence number. A peer remembers the last ``seq`` it received from a node
+and asks for ``export(since=seq)``, which returns only the entries changed
+after that point.
+
+Given a ``db_path`` (the app uses cybergame.db, next to ``students``), the
+ledger reloads its counters on start. Changes are queued and written by a
+background flusher every FLUSH_INTERVAL, and again at interpreter exit.
+Score posts therefore never wait on SQLite. Only a hard kill can lose the
+last fraction of a second of points.
+
+The node id is created once, as a readable label (CLASSROOM_NODE_ID or the
+hostname) plus a uuid4 suffix, and stored with the counters. A restarted
+node therefore keeps its points and its id, and every restart does not add
+another node component. Two machines never share an id
+unless one database file is copied to both.
+
+Peers must present REPLICATION_TOKEN to export or merge. A merged count can
+never be undone, so the replication endpoints stay closed while it is unset.
+"""
+import atexit
+import hmac
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+REPLICATION_TOKEN_HEADER = "X-Replication-Token"
+FLUSH_INTERVAL = 0.25  # Seconds between background writes of queued changes
+
+# One row per counter component. An entry's seq is the highest seq of its rows,
+# and the ledger's seq is the highest overall, so a local add is a single upsert.
+CREATE_LEDGER_TABLES = (
+    "CREATE TABLE IF NOT EXISTS score_ledger_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    """CREATE TABLE IF NOT EXISTS score_ledger_counts (
+    student TEXT NOT NULL,
+    module TEXT NOT NULL,
+    side TEXT NOT NULL,
+    node TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (student, module, side, node)
+)""",
+)
+UPSERT_COUNT = (
+    "INSERT INTO score_ledger_counts (student, module, side, node, count, seq) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (student, module, side, node) DO UPDATE SET count = excluded.count, seq = excluded.seq"
+)
+UPSERT_META = (
+    "INSERT INTO score_ledger_meta (key, value) VALUES (?, ?) "
+    "ON CONFLICT (key) DO UPDATE SET value = excluded.value"
+)
+
+
+def new_node_id(label=None):
+    """Returns a fresh, globally unique node id, e.g. 'room-a-3f2b...'."""
+    label = label or os.environ.get("CLASSROOM_NODE_ID") or socket.gethostname()
+    return f"{label}-{uuid.uuid4().hex}"
+
+
+def replication_token_matches(candidate, token=None):
+    """True when candidate equals REPLICATION_TOKEN; always False while no token is configured."""
+    token = os.environ.get("REPLICATION_TOKEN", "") if token is None else token
+    return bool(token) and bool(candidate) and hmac.compare_digest(
+        candidate.encode("utf-8"), token.encode("utf-8")
+    )
+
+
+class ScoreLedger:
+    """Per-student, per-module PN-counters with incremental export and merge.
+
+    Without a db_path the ledger is memory-only and, unless node_id is given,
+    uses a fresh id, so it is never confused with an earlier process.
+    """
+
+    def __init__(self, node_id=None, db_path=None):
+        self.seq = 0
+        # (student, module) -> {"p": {node: int}, "n": {node: int}, "seq": int}
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._db = None
+        # (student, module, side, node) -> row waiting for the next flush
+        self._pending = {}
+        self._flusher = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+            node_id = self._load(node_id)
+            atexit.register(self.flush)
+        self.node_id = node_id or new_node_id()
+
+    # --- PERSISTENCE ---
+    def _load(self, node_id):
+        """Creates the tables if needed, reads the counters back and returns the stored node id."""
+        db = self._db
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        for statement in CREATE_LEDGER_TABLES:
+            db.execute(statement)
+        meta = dict(db.execute("SELECT key, value FROM score_ledger_meta"))
+        stored = meta.get("node_id")
+        if stored is None or (node_id and node_id != stored):
+            stored = node_id or new_node_id()
+            db.execute(UPSERT_META, ("node_id", stored))
+        for student, module, side, node, count, seq in db.execute(
+            "SELECT student, module, side, node, count, seq FROM score_ledger_counts"
+        ):
+            entry = self._entry((student, module))
+            entry[side][node] = count
+            entry["seq"] = max(entry["seq"], seq)
+            self.seq = max(self.seq, seq)
+        return stored
+
+    def _persist(self, changes):
+        """Queues [(key, entry, [(side, node), ...])] for the flusher; caller holds self._lock."""
+        if self._db is None:
+            return
+        for (student, module), entry, counts in changes:
+            for side, node in counts:
+                self._pending[(student, module, side, node)] = (
+                    student, module, side, node, entry[side][node], entry["seq"]
+                )
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._run_flusher, name="score-ledger-flush", daemon=True)
+            self._flusher.start()
+
+    def flush(self):
+        """Writes every queued change in one transaction."""
+        with self._lock:
+            if not self._pending:
+                return
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(UPSERT_COUNT, list(self._pending.values()))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise  # Rows stay queued for the next attempt
+            self._pending.clear()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass  # Locked or full disk: keep the rows queued and retry next interval
+
+    def _entry(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = {"p": {}, "n": {}, "seq": 0}
+        return entry
+
+    # --- LOCAL UPDATES ---
+    def add(self, student, module, points):
+        """Records points (positive or negative) earned on this node."""
+        if not points:
+            return self.total(student, module)
+        side = "p" if points > 0 else "n"
+        with self._lock:
+            key = (student, module)
+            entry = self._entry(key)
+            entry[side][self.node_id] = entry[side].get(self.node_id, 0) + abs(points)
+            self.seq += 1
+            entry["seq"] = self.seq
+            self._persist([(key, entry, [(side, self.node_id)])])
+            return sum(entry["p"].values()) - sum(entry["n"].values())
+
+    # --- READS ---
+    def total(self, student, module):
+        with self._lock:
+            entry = self._entries.get((student, module))
+            if entry is None:
+                return 0
+            return sum(entry["p"].values()) - sum(entry["n"].values())
+
+    def totals(self):
+        """Returns {student: {module: score}} for every known counter."""
+        result = {}
+        with self._lock:
+            for (student, module), entry in self._entries.items():
+                result.setdefault(student, {})[module] = sum(entry["p"].values()) - sum(entry["n"].values())
+        return result
+
+    # --- REPLICATION ---
+    def export(self, since=0):
+        """Returns a state snapshot holding only entries changed after sequence `since`."""
+        with self._lock:
+            entries = [
+                {"student": student, "module": module, "p": dict(entry["p"]), "n": dict(entry["n"])}
+                for (student, module), entry in self._entries.items()
+                if entry["seq"] > since
+            ]
+            return {"node": self.node_id, "seq": self.seq, "entries": entries}
+
+    def merge(self, snapshot):
+        """Folds a peer snapshot in by per-node maximum. Returns the number of entries that changed."""
+        changes = []
+        with self._lock:
+            for item in snapshot.get("entries", []):
+                key = (item["student"], item["module"])
+                entry = self._entry(key)
+                counts = []
+                for side in ("p", "n"):
+                    mine = entry[side]
+                    for node, count in item.get(side, {}).items():
+                        if count > mine.get(node, 0):
+                            mine[node] = count
+                            counts.append((side, node))
+                if counts:
+                    self.seq += 1
+                    entry["seq"] = self.seq
+                    changes.append((key, entry, counts))
+            if changes:
+                self._persist(changes)
+        return len(changes)
+
+
+def validate_snapshot(snapshot):
+    """Returns an error message if snapshot is not a well-formed export, else None."""
+    if not isinstance(snapshot, dict) or not isinstance(snapshot.get("entries"), list):
+        return "Snapshot must be an object with an 'entries' list"
+    for item in snapshot["entries"]:
+        if not isinstance(item, dict) or not isinstance(item.get("student"), str) or not isinstance(item.get("module"), str):
+            return "Each entry needs string 'student' and 'module' fields"
+        for side in ("p", "n"):
+            counts = item.get(side, {})
+            if not isinstance(counts, dict) or not all(
+                isinstance(node, str) and isinstance(count, int) and not isinstance(count, bool) and count >= 0
+                for node, count in counts.items()
+            ):
+                return f"Entry '{side}' must map node ids to non-negative integers"
+    return None
@@ -0,0 +1,222 @@
+"""Session expiry for idle students and ghost sessions.
+
+Timers live in a two-level hierarchical timing wheel (1 s ticks, 64 slots per
+level, about 68 minutes of direct range). Scheduling a timer is O(1), and each
+tick only touches the one slot that is due. There is no scan over every
+active student like the setInterval loop in localserver.js.
+
+Heartbeats never search the wheel for an old timer. Each heartbeat stamps
+the session with a fresh generation number, and timers from an older
+generation are discarded when their slot comes due.
+
+Semantics match localserver.js:
+
+* 15 s without a heartbeat: the session becomes a ghost, and a new join for
+  the same student may take it over.
+* 45 s without a heartbeat: the session is dropped. Its presence entry and
+  its assessment state are both removed through the ``on_drop`` callback.
+* An explicit leave ends presence at once. Assessment state is kept so the
+  student can come back, as ``/api/multiplayer/leave`` does. It is still
+  dropped 45 s after the last heartbeat unless the student rejoins first.
+
+Deadlines are rounded up to whole ticks, so a timer never fires early.
+* Background tabs (``inactive``) can be taken over right away and are not
+  dropped at 45 s. They are capped at INACTIVE_DROP_AFTER so they cannot
+  live forever.
+"""
+import itertools
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# --- EXPIRY CONFIGURATION ---
+GHOST_AFTER = 15          # Seconds without a heartbeat before a join may override the session
+DROP_AFTER = 45           # Seconds without a heartbeat before the session is evicted
+INACTIVE_DROP_AFTER = 900 # Upper bound for sessions parked in a background tab
+TICK_SECONDS = 1.0
+WHEEL_SLOTS = 64          # Slots per wheel level
+
+GHOST = "ghost"
+DROP = "drop"
+
+
+class TimingWheel:
+    """Two-level hierarchical timing wheel keyed by integer ticks."""
+
+    def __init__(self, slots=WHEEL_SLOTS, start_tick=0):
+        self.slots = slots
+        self.current_tick = start_tick
+        self.levels = [[[] for _ in range(slots)] for _ in range(2)]
+        self.size = 0
+
+    def schedule(self, deadline_tick, item):
+        """Files item under deadline_tick in O(1). Past deadlines fire on the next tick."""
+        deadline_tick = max(deadline_tick, self.current_tick + 1)
+        self._insert(deadline_tick, item)
+        self.size += 1
+
+    def _insert(self, deadline_tick, item):
+        slots = self.slots
+        delta = deadline_tick - self.current_tick
+        if delta < slots:
+            self.levels[0][deadline_tick % slots].append((deadline_tick, item))
+        elif delta < slots * (slots - 1):
+            self.levels[1][(deadline_tick // slots) % slots].append((deadline_tick, item))
+        else:
+            # Beyond the wheel's range: park in the farthest outer slot, re-filed when it cascades
+            far_slot = (self.current_tick // slots + slots - 1) % slots
+            self.levels[1][far_slot].append((deadline_tick, item))
+
+    def advance(self, target_tick):
+        """Moves the wheel to target_tick and returns the items that came due, in order."""
+        due = []
+        slots = self.slots
+        while self.current_tick < target_tick:
+            self.current_tick += 1
+            if self.current_tick % slots == 0:
+                # Entering a new outer block: spread its timers over the inner wheel
+                outer = self.levels[1][(self.current_tick // slots) % slots]
+                self.levels[1][(self.current_tick // slots) % slots] = []
+                for deadline_tick, item in outer:
+                    self._insert(deadline_tick, item)
+            index = self.current_tick % slots
+            bucket = self.levels[0][index]
+            if not bucket:
+                continue
+            self.levels[0][index] = []
+            for deadline_tick, item in bucket:
+                if deadline_tick <= self.current_tick:
+                    due.append(item)
+                    self.size -= 1
+                else:
+                    self._insert(deadline_tick, item)
+        return due
+
+
+class SessionTracker:
+    """Tracks student presence and expires idle sessions using a TimingWheel."""
+
+    def __init__(self, on_drop=None, clock=time.monotonic, tick_seconds=TICK_SECONDS):
+        self.on_drop = on_drop
+        self.clock = clock
+        self.tick_seconds = tick_seconds
+        self.sessions = {}
+        # Sessions that left explicitly: id -> generation whose DROP timer still frees their state
+        self._departed = {}
+        self._generations = itertools.count(1)
+        self.wheel = TimingWheel(start_tick=self._tick(clock()))
+        self._lock = threading.Lock()
+        self._ticker = None
+
+    def _tick(self, now):
+        return int(now // self.tick_seconds)
+
+    def _deadline_tick(self, deadline):
+        # Round up: the wheel fires a tick once the clock reaches its start
+        return math.ceil(deadline / self.tick_seconds)
+
+    def _schedule(self, session_id, session, now):
+        gen = session["gen"]
+        self.wheel.schedule(self._deadline_tick(now + GHOST_AFTER), (session_id, gen, GHOST))
+        drop_after = INACTIVE_DROP_AFTER if session["inactive"] else DROP_AFTER
+        self.wheel.schedule(self._deadline_tick(now + drop_after), (session_id, gen, DROP))
+
+    def _heartbeat_locked(self, session, session_id, now, inactive, info):
+        # Caller holds self._lock, so expiry never sees a half-updated session
+        session.update(info)
+        session["gen"] = next(self._generations)
+        session["last_seen"] = now
+        session["inactive"] = bool(inactive)
+        session["ghost"] = False
+        self._departed.pop(session_id, None)  # Back before the drop: keep the state
+        self._schedule(session_id, session, now)
+        return session
+
+    # --- PRESENCE API ---
+    def heartbeat(self, session_id, inactive=False, **info):
+        """Records activity for session_id, creating the session if needed."""
+        now = self.clock()
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.sessions[session_id] = {}
+            self._heartbeat_locked(session, session_id, now, inactive, info)
+        self._ensure_ticker()
+        return session
+
+    def join(self, session_id, inactive=False, **info):
+        """Starts a session, evicting a ghost. Returns None if a live session already holds the id."""
+        now = self.clock()
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is not None and not (
+                session["ghost"] or session["inactive"] or now - session["last_seen"] > GHOST_AFTER
+            ):
+                return None
+            # Ghost override keeps the assessment state; only presence is replaced
+            session = self.sessions[session_id] = {}
+            self._heartbeat_locked(session, session_id, now, inactive, info)
+        self._ensure_ticker()
+        return session
+
+    def leave(self, session_id):
+        """Ends presence immediately; assessment state is dropped 45 s after the last heartbeat."""
+        with self._lock:
+            removed = self.sessions.pop(session_id, None)
+            if removed is not None:
+                gen = removed["gen"]
+                self._departed[session_id] = gen
+                # A background tab's DROP timer is far off; re-arm at the normal 45 s
+                self.wheel.schedule(self._deadline_tick(removed["last_seen"] + DROP_AFTER), (session_id, gen, DROP))
+        return removed is not None
+
+    # --- EXPIRY ---
+    def expire_due(self):
+        """Processes only the wheel slots that came due since the last call."""
+        dropped = []
+        with self._lock:
+            # advance() hands each timer out once, so every item is handled on its own
+            for session_id, gen, kind in self.wheel.advance(self._tick(self.clock())):
+                try:
+                    session = self.sessions.get(session_id)
+                    if session is None:
+                        if kind == DROP and self._departed.get(session_id) == gen:
+                            del self._departed[session_id]
+                            dropped.append(session_id)
+                        continue
+                    if session.get("gen") != gen:
+                        continue  # Superseded by a later heartbeat
+                    if kind == GHOST:
+                        session["ghost"] = True
+                    else:
+                        del self.sessions[session_id]
+                        dropped.append(session_id)
+                except Exception:
+                    logger.exception("Expiry failed for session %s", session_id)
+        if self.on_drop:
+            for session_id in dropped:
+                try:
+                    self.on_drop(session_id)
+                except Exception:
+                    # One failing callback must not skip the rest of the dropped sessions
+                    logger.exception("on_drop failed for session %s", session_id)
+        return dropped
+
+    def _run_ticker(self):
+        while True:
+            time.sleep(self.tick_seconds)
+            try:
+                self.expire_due()
+            except Exception:
+                logger.exception("Session expiry tick failed")
+
+    def _ensure_ticker(self):
+        if self._ticker is not None:
+            return
+        with self._lock:
+            if self._ticker is None:
+                self._ticker = threading.Thread(target=self._run_ticker, name="session-expiry", daemon=True)
+                self._ticker.start()
@@ -1 +1 @@
-gunicorn app:app
\ No newline at end of file
+gunicorn --config gunicorn.conf.py app:app
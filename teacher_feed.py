@@ -0,0 +1,160 @@
+"""Live teacher dashboard feed over Server-Sent Events.
+
+One aggregator thread wakes every FEED_INTERVAL seconds, takes a single
+snapshot of class progress, diffs it against the previous snapshot and
+encodes the changed students once as an SSE ``delta`` event. That same
+encoded payload is handed to every connected dashboard, so the cost of a
+tick does not grow with the number of viewers. Changes made between ticks
+are coalesced into one delta per student.
+
+A new dashboard first receives a full ``snapshot`` event and then only
+deltas. A viewer that falls too far behind is dropped back to a fresh
+snapshot instead of buffering without limit.
+
+Every open stream holds a server thread, so at most MAX_SUBSCRIBERS
+dashboards are served at once. Extra viewers get a ``503`` and retry later.
+"""
+import json
+import queue
+import threading
+import time
+
+from flask import Response, stream_with_context
+
+# --- FEED CONFIGURATION ---
+FEED_INTERVAL = 1.0           # Seconds between aggregation passes
+HEARTBEAT_INTERVAL = 15.0     # Seconds between keep-alive comments on an idle stream
+SUBSCRIBER_BACKLOG = 30       # Pending deltas per viewer before it is resynced
+RETRY_MS = 3000               # Client reconnect delay advertised to EventSource
+MAX_SUBSCRIBERS = 8           # Concurrent dashboards; each one pins a server thread
+BUSY_RETRY_SECONDS = 5        # Retry-After for dashboards turned away at the cap
+
+
+def _encode(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+def diff_snapshots(previous, current):
+    """Returns (changed, removed): students whose progress changed and ids that disappeared."""
+    changed = {sid: row for sid, row in current.items() if previous.get(sid) != row}
+    removed = [sid for sid in previous if sid not in current]
+    return changed, removed
+
+
+class _Subscriber:
+    __slots__ = ("queue", "needs_snapshot")
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_BACKLOG)
+        self.needs_snapshot = False
+
+
+class ProgressFeed:
+    """Fans one periodic aggregation pass out to every connected teacher dashboard."""
+
+    def __init__(self, snapshot_fn, interval=FEED_INTERVAL, max_subscribers=MAX_SUBSCRIBERS):
+        self.snapshot_fn = snapshot_fn
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self.version = 0
+        self._current = {}
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    # --- AGGREGATION ---
+    def tick(self):
+        """Runs one aggregation pass and broadcasts the coalesced delta, if any."""
+        current = self.snapshot_fn()
+        with self._lock:
+            changed, removed = diff_snapshots(self._current, current)
+            self._current = current
+            if not changed and not removed:
+                return False
+            self.version += 1
+            payload = _encode("delta", {"version": self.version, "changed": changed, "removed": removed})
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(payload)
+            except queue.Full:
+                subscriber.needs_snapshot = True
+        return True
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            try:
+                self.tick()
+            except Exception:
+                # A bad snapshot must not kill the feed for every dashboard
+                pass
+
+    # --- SUBSCRIPTIONS ---
+    def subscribe(self):
+        """Registers a dashboard. Returns None when the subscriber cap is reached."""
+        subscriber = _Subscriber()
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._current = self.snapshot_fn()
+                self._thread = threading.Thread(target=self._run, name="teacher-feed", daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _snapshot_event(self):
+        with self._lock:
+            return _encode("snapshot", {"version": self.version, "students": self._current})
+
+    def is_full(self):
+        with self._lock:
+            return len(self._subscribers) >= self.max_subscribers
+
+    def stream(self):
+        """Yields SSE chunks for one dashboard until the client disconnects."""
+        subscriber = self.subscribe()
+        if subscriber is None:
+            # Lost a race for the last slot after response() checked; ask the client to come back later
+            yield f"retry: {BUSY_RETRY_SECONDS * 1000}\n\n".encode("utf-8")
+            return
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode("utf-8")
+            yield self._snapshot_event()
+            while True:
+                if subscriber.needs_snapshot:
+                    subscriber.needs_snapshot = False
+                    # Stale deltas are superseded by the fresh snapshot
+                    while not subscriber.queue.empty():
+                        subscriber.queue.get_nowait()
+                    yield self._snapshot_event()
+                try:
+                    yield subscriber.queue.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield b": keep-alive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def response(self):
+        """Builds the streaming Flask response for a new dashboard connection, or a 503 at the cap."""
+        if self.is_full():
+            return Response(
+                f"retry: {BUSY_RETRY_SECONDS * 1000}\n\n",
+                status=503,
+                mimetype="text/event-stream",
+                headers={"Retry-After": str(BUSY_RETRY_SECONDS), "Cache-Control": "no-cache"},
+            )
+        return Response(
+            stream_with_context(self.stream()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
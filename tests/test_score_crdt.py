@@ -0,0 +1,138 @@
+"""Convergence tests for the PN-counter score ledger."""
+import itertools
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from score_crdt import ScoreLedger, new_node_id, replication_token_matches, validate_snapshot  # noqa: E402
+
+STUDENTS = ["STU_001", "STU_002", "STU_003"]
+MODULES = ["phishing", "password", "mfa"]
+
+
+def _random_adds(ledger, rng, count, expected):
+    for _ in range(count):
+        student, module = rng.choice(STUDENTS), rng.choice(MODULES)
+        points = rng.choice([-5, 0, 5, 10])
+        ledger.add(student, module, points)
+        if points:  # A zero add does not create a counter
+            expected[(student, module)] = expected.get((student, module), 0) + points
+
+
+def _expected_totals(expected):
+    totals = {}
+    for (student, module), score in expected.items():
+        totals.setdefault(student, {})[module] = score
+    return totals
+
+
+def _sync(dst, src, cursors):
+    """Pulls src's changes into dst incrementally, remembering the last seq seen."""
+    key = (dst.node_id, src.node_id)
+    snapshot = src.export(since=cursors.get(key, 0))
+    assert validate_snapshot(snapshot) is None
+    dst.merge(snapshot)
+    cursors[key] = snapshot["seq"]
+
+
+def test_interleaved_adds_and_merges_converge_in_any_order():
+    for seed in range(20):
+        rng = random.Random(seed)
+        nodes = [ScoreLedger(node_id=f"node-{i}") for i in range(3)]
+        expected = {}
+        cursors = {}
+        for _ in range(30):
+            _random_adds(rng.choice(nodes), rng, rng.randint(0, 3), expected)
+            dst, src = rng.sample(nodes, 2)
+            _sync(dst, src, cursors)
+
+        # Finish with full gossip rounds, each in a different pair order
+        pairs = list(itertools.permutations(nodes, 2))
+        for _ in range(2):
+            rng.shuffle(pairs)
+            for dst, src in pairs:
+                _sync(dst, src, cursors)
+
+        totals = _expected_totals(expected)
+        for node in nodes:
+            assert node.totals() == totals
+
+
+def test_repeated_and_reordered_merges_are_idempotent():
+    rng = random.Random(7)
+    a, b, c = (ScoreLedger(node_id=name) for name in ("a", "b", "c"))
+    expected = {}
+    for node in (a, b, c):
+        _random_adds(node, rng, 10, expected)
+    snapshots = [node.export() for node in (a, b, c)]
+
+    for order in itertools.permutations(snapshots):
+        target = ScoreLedger(node_id="target")
+        for snapshot in order:
+            target.merge(snapshot)
+        assert target.totals() == _expected_totals(expected)
+        # Merging the same snapshots again, in any order, changes nothing
+        for snapshot in reversed(order):
+            assert target.merge(snapshot) == 0
+        assert target.totals() == _expected_totals(expected)
+
+
+def test_incremental_export_only_returns_changed_entries():
+    a, b = ScoreLedger(node_id="a"), ScoreLedger(node_id="b")
+    a.add("STU_001", "mfa", 10)
+    first = a.export()
+    b.merge(first)
+    assert a.export(since=first["seq"])["entries"] == []
+
+    a.add("STU_002", "mfa", 5)
+    delta = a.export(since=first["seq"])
+    assert [entry["student"] for entry in delta["entries"]] == ["STU_002"]
+    b.merge(delta)
+    assert b.totals() == a.totals()
+
+
+def test_restarted_node_keeps_its_points_and_id(tmp_path):
+    db_path = str(tmp_path / "cybergame.db")
+    survivor = ScoreLedger(node_id="survivor")
+    first = ScoreLedger(db_path=db_path)
+    first.add("STU_001", "mfa", 10)
+    first.merge(survivor.export())
+    first.flush()  # What the background flusher and the exit hook do
+    node_id, seq = first.node_id, first.seq
+
+    # Restart before any peer pulled: nothing is lost and no new node component appears
+    restarted = ScoreLedger(db_path=db_path)
+    assert restarted.node_id == node_id
+    assert restarted.seq == seq
+    assert restarted.totals() == {"STU_001": {"mfa": 10}}
+    restarted.add("STU_001", "mfa", -3)
+    assert restarted.export(since=seq)["entries"] == [
+        {"student": "STU_001", "module": "mfa", "p": {node_id: 10}, "n": {node_id: 3}}
+    ]
+
+    survivor.merge(restarted.export())
+    assert survivor.total("STU_001", "mfa") == 7
+
+
+def test_merged_counts_are_persisted(tmp_path):
+    db_path = str(tmp_path / "cybergame.db")
+    peer = ScoreLedger(node_id="peer")
+    peer.add("STU_002", "phishing", 10)
+    ledger = ScoreLedger(db_path=db_path)
+    assert ledger.merge(peer.export()) == 1
+    ledger.flush()
+    assert ScoreLedger(db_path=db_path).totals() == {"STU_002": {"phishing": 10}}
+
+
+def test_memory_only_ledgers_get_unique_ids():
+    assert ScoreLedger().node_id != ScoreLedger().node_id
+    assert new_node_id("room-a").startswith("room-a-")
+
+
+def test_replication_token_is_required():
+    assert not replication_token_matches("anything", token="")
+    assert not replication_token_matches("", token="secret")
+    assert not replication_token_matches("\u00e9", token="secret")
+    assert replication_token_matches("secret", token="secret")
@@ -0,0 +1,125 @@
+"""Tests for the timing wheel and the session expiry semantics built on it."""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_expiry import DROP_AFTER, GHOST_AFTER, SessionTracker, TimingWheel  # noqa: E402
+
+SLOTS = 8
+
+
+def _fire_ticks(wheel, until):
+    """Advances one tick at a time and returns {item: tick it fired on}."""
+    fired = {}
+    while wheel.current_tick < until:
+        tick = wheel.current_tick + 1
+        for item in wheel.advance(tick):
+            fired[item] = tick
+    return fired
+
+
+def test_timers_fire_on_their_deadline_across_cascades():
+    wheel = TimingWheel(slots=SLOTS, start_tick=5)
+    # Inner wheel, exactly one block ahead, deep in the outer wheel and past its range
+    deadlines = [6, 12, 13, 5 + SLOTS, 16, 63, 64, 65, 5 + SLOTS * (SLOTS - 1), 200, 1000]
+    for deadline in deadlines:
+        wheel.schedule(deadline, deadline)
+    fired = _fire_ticks(wheel, 1100)
+    assert fired == {deadline: deadline for deadline in deadlines}
+    assert wheel.size == 0
+
+
+def test_slot_aliasing_does_not_fire_later_rounds_early():
+    wheel = TimingWheel(slots=SLOTS, start_tick=0)
+    # Same inner slot and same outer slot, different rounds
+    wheel.schedule(3, "inner-now")
+    wheel.schedule(3 + SLOTS, "inner-next")
+    wheel.schedule(3 + SLOTS * SLOTS, "outer-next")
+    assert wheel.advance(3) == ["inner-now"]
+    assert wheel.advance(3 + SLOTS - 1) == []
+    assert wheel.advance(3 + SLOTS) == ["inner-next"]
+    assert wheel.advance(3 + SLOTS * SLOTS - 1) == []
+    assert wheel.advance(3 + SLOTS * SLOTS) == ["outer-next"]
+
+
+def test_random_schedules_match_a_reference_model():
+    rng = random.Random(42)
+    wheel = TimingWheel(slots=SLOTS, start_tick=rng.randint(0, 100))
+    expected = {}
+    fired = {}
+    for item in range(500):
+        now = wheel.current_tick
+        deadline = now + rng.choice([rng.randint(-3, SLOTS), rng.randint(0, SLOTS * SLOTS * 2)])
+        wheel.schedule(deadline, item)
+        expected[item] = max(deadline, now + 1)  # Past deadlines fire on the next tick
+        fired.update(_fire_ticks(wheel, now + rng.randint(0, 3)))
+    fired.update(_fire_ticks(wheel, max(expected.values())))
+    assert fired == expected
+
+
+class FakeClock:
+    def __init__(self, now=1000.5):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _tracker():
+    clock = FakeClock()
+    dropped = []
+    tracker = SessionTracker(on_drop=dropped.append, clock=clock)
+    tracker._ensure_ticker = lambda: None  # Drive expiry by hand
+    return tracker, clock, dropped
+
+
+def test_ghost_and_drop_never_fire_early():
+    tracker, clock, dropped = _tracker()
+    start = clock.now
+    tracker.join("STU_001")
+
+    clock.now = start + GHOST_AFTER - 0.01
+    tracker.expire_due()
+    assert not tracker.sessions["STU_001"]["ghost"]
+    clock.now = start + GHOST_AFTER + 1
+    tracker.expire_due()
+    assert tracker.sessions["STU_001"]["ghost"]
+
+    clock.now = start + DROP_AFTER - 0.01
+    assert tracker.expire_due() == []
+    clock.now = start + DROP_AFTER + 1
+    assert tracker.expire_due() == ["STU_001"]
+    assert dropped == ["STU_001"]
+
+
+def test_leave_still_frees_state_after_the_drop_delay():
+    tracker, clock, dropped = _tracker()
+    start = clock.now
+    tracker.join("STU_005", inactive=True)  # Background tab: its own drop timer is 15 minutes out
+    assert tracker.leave("STU_005")
+    assert "STU_005" not in tracker.sessions
+
+    clock.now = start + DROP_AFTER - 0.01
+    assert tracker.expire_due() == []
+    clock.now = start + DROP_AFTER + 1
+    assert tracker.expire_due() == ["STU_005"]
+    clock.now = start + 1000
+    assert tracker.expire_due() == []
+    assert dropped == ["STU_005"]
+
+
+def test_rejoin_after_leave_keeps_state():
+    tracker, clock, dropped = _tracker()
+    start = clock.now
+    tracker.join("STU_006")
+    tracker.leave("STU_006")
+    clock.now = start + 10
+    assert tracker.join("STU_006") is not None
+
+    clock.now = start + DROP_AFTER + 1
+    assert tracker.expire_due() == []
+    clock.now = start + 10 + DROP_AFTER + 1
+    assert tracker.expire_due() == ["STU_006"]
+    assert dropped == ["STU_006"]